@@ -0,0 +1,78 @@
+"""
+Benchmark da avaliação paralela em blocos de linhas de calculate_emergy.
+
+Uso:
+    python benchmarks/bench_parallel_emergy.py --rows 2000000 --flows 16
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Adiciona o diretório raiz ao PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.emergy_calculator import EmergyCalculator
+
+def build_matrix(rows: int, flows: int) -> pd.DataFrame:
+    """Cria uma matriz LCI sintética."""
+    rng = np.random.default_rng(0)
+    data = {'Processo': np.arange(rows)}
+    for j in range(flows):
+        data[f'Fluxo {j}'] = rng.random(rows) * 10.0 ** rng.integers(0, 5)
+    return pd.DataFrame(data)
+
+def main():
+    """
+    Executa o benchmark e imprime a curva de speedup.
+
+    "blocos" mede apenas a avaliação paralela das linhas; "total" inclui a
+    montagem do resultado, que guarda os arrays sem criar um dicionário.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--flows', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    matrix = build_matrix(args.rows, args.flows)
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+
+    print(f"Matriz: {args.rows} processos x {args.flows} fluxos")
+    flow_columns = [col for col in matrix.columns if col != 'Processo']
+    print(f"{'workers':>8} {'blocos (s)':>11} {'speedup':>8} {'total (s)':>10} {'speedup':>8}")
+    baseline = None
+    reference = None
+    for count in workers:
+        calculator = EmergyCalculator(workers=count)
+        calculator.set_transformity_factors({})
+        transformity = calculator._transformity_array(flow_columns)
+        calculator.calculate_emergy(matrix)
+
+        kernel = total = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            calculator._weighted_row_sums(matrix, flow_columns, transformity)
+            kernel = min(kernel, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = calculator.calculate_emergy(matrix)
+            total = min(total, time.perf_counter() - start)
+        calculator.set_workers(1)
+
+        # Blocos de tamanho fixo: o resultado não depende do número de workers
+        if reference is None:
+            reference = result.total_emergy
+        assert result.total_emergy == reference
+        baseline = baseline or (kernel, total)
+        print(f"{count:>8} {kernel:>11.3f} {baseline[0] / kernel:>8.2f} "
+              f"{total:>10.3f} {baseline[1] / total:>8.2f}")
+
+if __name__ == "__main__":
+    main()
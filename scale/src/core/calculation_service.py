@@ -0,0 +1,383 @@
+"""
+Serviço local de cálculo emergético com agrupamento de requisições.
+
+Mantém as matrizes LCI carregadas em memória e combina requisições
+simultâneas sobre a mesma matriz em uma única avaliação em lote.
+"""
+import json
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .lci_manager import LCIManager
+from .emergy_calculator import EmergyCalculator, EmergyResult, emergy_arrays
+
+def result_to_dict(result: EmergyResult) -> Dict:
+    """
+    Converte um EmergyResult em um dicionário serializável em JSON.
+
+    Args:
+        result: Resultado a ser convertido
+
+    Returns:
+        Dicionário com os campos do resultado
+    """
+    names, values = emergy_arrays(result.process_emergy)
+    metadata = dict(result.metadata)
+    if 'matrix_shape' in metadata:
+        metadata['matrix_shape'] = list(metadata['matrix_shape'])
+    return {
+        'total_emergy': result.total_emergy,
+        'process_emergy': dict(zip(map(str, names.tolist()), values.tolist())),
+        'transformity': result.transformity,
+        'calculation_date': result.calculation_date.isoformat(),
+        'metadata': metadata
+    }
+
+class CalculationService:
+    """Serviço de cálculo com matrizes em memória, lotes e pool de workers."""
+
+    def __init__(self, lci_manager: Optional[LCIManager] = None,
+                 workers: int = 4, batch_window: float = 0.005):
+        """
+        Inicializa o serviço.
+
+        Args:
+            lci_manager: Gerenciador com as matrizes (um novo é criado se omitido)
+            workers: Número de threads do pool de cálculo
+            batch_window: Tempo (s) de espera para agrupar requisições
+        """
+        self.lci_manager = lci_manager or LCIManager()
+        self.calculator = EmergyCalculator()
+        self._batch_window = batch_window
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='scale-worker')
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[Dict[str, float], Future, float]]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._closed = False
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self._started_at = time.perf_counter()
+        self._latencies = deque(maxlen=1000)
+        self._completed = 0
+        self._failed = 0
+        self._batches = 0
+        self._batched_requests = 0
+
+    def load_matrix(self, name: str, file_path: str) -> bool:
+        """
+        Importa uma matriz e a mantém carregada para os cálculos.
+
+        Args:
+            name: Nome da matriz
+            file_path: Caminho do arquivo LCI
+
+        Returns:
+            bool: True se a importação foi bem-sucedida
+        """
+        return self.lci_manager.import_lci_file(file_path, name)
+
+    def submit(self, matrix_name: str,
+               transformity: Optional[Dict[str, float]] = None) -> Future:
+        """
+        Agenda um cálculo, agrupando-o com outros pedidos para a mesma matriz.
+
+        Args:
+            matrix_name: Nome da matriz carregada
+            transformity: Fatores de transformidade do cálculo
+
+        Returns:
+            Future que recebe o EmergyResult
+        """
+        future = Future()
+        try:
+            factors = self._normalize_factors(transformity)
+        except (TypeError, ValueError) as e:
+            # Fatores inválidos falham apenas esta requisição
+            with self._lock:
+                self._failed += 1
+            future.set_exception(e)
+            return future
+
+        with self._lock:
+            if self._closed:
+                future.set_exception(RuntimeError("Serviço encerrado"))
+                return future
+            queue = self._pending.setdefault(matrix_name, [])
+            queue.append((factors, future, time.perf_counter()))
+            if len(queue) == 1:
+                timer = threading.Timer(self._batch_window, self._dispatch, args=(matrix_name,))
+                timer.daemon = True
+                self._timers[matrix_name] = timer
+                timer.start()
+        return future
+
+    @staticmethod
+    def _normalize_factors(transformity) -> Dict[str, float]:
+        """
+        Valida e converte os fatores de transformidade de uma requisição.
+
+        Raises:
+            TypeError: se os fatores não forem um dicionário
+            ValueError: se algum fator não for um número finito
+        """
+        if transformity is None:
+            return {}
+        if not isinstance(transformity, dict):
+            raise TypeError("Os fatores de transformidade devem ser um dicionário")
+        factors = {}
+        for flow, value in transformity.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Fator de transformidade inválido para {flow}: {value!r}")
+            if not math.isfinite(value):
+                raise ValueError(f"Fator de transformidade não finito para {flow}")
+            factors[str(flow)] = float(value)
+        return factors
+
+    def calculate(self, matrix_name: str,
+                  transformity: Optional[Dict[str, float]] = None,
+                  timeout: Optional[float] = None) -> EmergyResult:
+        """
+        Calcula a emergia de uma matriz carregada e aguarda o resultado.
+
+        Args:
+            matrix_name: Nome da matriz carregada
+            transformity: Fatores de transformidade do cálculo
+            timeout: Tempo máximo de espera (s)
+
+        Returns:
+            EmergyResult do cálculo
+        """
+        return self.submit(matrix_name, transformity).result(timeout)
+
+    def _dispatch(self, matrix_name: str) -> None:
+        """Envia o lote pendente de uma matriz para o pool de workers."""
+        with self._lock:
+            self._timers.pop(matrix_name, None)
+            batch = self._pending.pop(matrix_name, [])
+        if not batch:
+            return
+        try:
+            self._executor.submit(self._run_batch, matrix_name, batch)
+        except RuntimeError as e:
+            # O pool foi encerrado entre o disparo do timer e o envio
+            self._fail_batch(batch, e)
+
+    def _fail_batch(self, batch: List[Tuple[Dict[str, float], Future, float]],
+                    error: Exception) -> None:
+        """Propaga um erro para todas as requisições de um lote."""
+        with self._lock:
+            self._failed += len(batch)
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _run_batch(self, matrix_name: str,
+                   batch: List[Tuple[Dict[str, float], Future, float]]) -> None:
+        """Avalia um lote de requisições em uma única passagem sobre a matriz."""
+        try:
+            matrix = self.lci_manager.get_matrix(matrix_name)
+            if matrix is None:
+                raise KeyError(f"Matriz não encontrada: {matrix_name}")
+
+            # Requisições com os mesmos fatores compartilham o cenário
+            scenarios: Dict[Tuple, int] = {}
+            factor_sets = []
+            for transformity, _, _ in batch:
+                key = tuple(sorted(transformity.items()))
+                if key not in scenarios:
+                    scenarios[key] = len(factor_sets)
+                    factor_sets.append(transformity)
+
+            try:
+                scenario_outcomes = [(result, None) for result in
+                                     self.calculator.calculate_emergy_batch(matrix, factor_sets)]
+            except Exception:
+                # Reavalia cenário a cenário para que só o inválido falhe
+                scenario_outcomes = []
+                for factors in factor_sets:
+                    try:
+                        scenario_outcomes.append(
+                            (self.calculator.calculate_emergy_batch(matrix, [factors])[0], None))
+                    except Exception as e:
+                        scenario_outcomes.append((None, e))
+            outcomes = [scenario_outcomes[scenarios[tuple(sorted(t.items()))]]
+                        for t, _, _ in batch]
+        except Exception as e:
+            outcomes = [(None, e)] * len(batch)
+
+        finished = time.perf_counter()
+        with self._lock:
+            self._batches += 1
+            self._batched_requests += len(batch)
+            for (_, _, submitted), (_, error) in zip(batch, outcomes):
+                self._latencies.append(finished - submitted)
+                if error is None:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+        for (_, future, _), (result, error) in zip(batch, outcomes):
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def get_metrics(self) -> Dict:
+        """
+        Retorna as métricas de latência e vazão do serviço.
+
+        Returns:
+            Dicionário com as métricas
+        """
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+            uptime = time.perf_counter() - self._started_at
+            return {
+                'uptime_s': uptime,
+                'completed_requests': self._completed,
+                'failed_requests': self._failed,
+                'batches': self._batches,
+                'mean_batch_size': (self._batched_requests / self._batches
+                                    if self._batches else 0.0),
+                'throughput_rps': self._completed / uptime if uptime else 0.0,
+                'latency_p50_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else 0.0,
+                'latency_p95_ms': float(np.percentile(latencies, 95) * 1000) if len(latencies) else 0.0,
+                'matrices': self.lci_manager.list_available_matrices()
+            }
+
+    def start(self, host: str = '127.0.0.1', port: int = 8765) -> Tuple[str, int]:
+        """
+        Inicia o servidor HTTP em uma thread de fundo.
+
+        Args:
+            host: Endereço de escuta (padrão: apenas localhost)
+            port: Porta de escuta (0 escolhe uma porta livre)
+
+        Returns:
+            Tupla (host, porta) efetivamente utilizada
+        """
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever,
+                                               daemon=True)
+        self._server_thread.start()
+        return self._server.server_address[:2]
+
+    def serve_forever(self, host: str = '127.0.0.1', port: int = 8765) -> None:
+        """Inicia o servidor HTTP e bloqueia até a interrupção."""
+        address = self.start(host, port)
+        print(f"Serviço SCALE em http://{address[0]}:{address[1]}")
+        try:
+            self._server_thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """
+        Encerra o servidor HTTP e o pool de workers.
+
+        Requisições ainda não enviadas ao pool falham com RuntimeError;
+        os lotes já em execução são concluídos.
+        """
+        with self._lock:
+            self._closed = True
+            timers = list(self._timers.values())
+            pending = [item for batch in self._pending.values() for item in batch]
+            self._timers.clear()
+            self._pending.clear()
+        for timer in timers:
+            timer.cancel()
+        if pending:
+            self._fail_batch(pending, RuntimeError("Serviço encerrado"))
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._executor.shutdown(wait=True)
+
+def _make_handler(service: CalculationService):
+    """Cria a classe de tratamento HTTP ligada ao serviço."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        Rotas:
+            GET  /matrices   lista as matrizes carregadas
+            POST /matrices   {"name", "file_path"} importa uma matriz
+            POST /calculate  {"matrix", "transformity"} calcula a emergia
+            GET  /metrics    métricas de latência e vazão
+        """
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload) -> None:
+            body = json.dumps(payload, allow_nan=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> Dict:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError("O corpo da requisição deve ser um objeto JSON")
+            return payload
+
+        def do_GET(self):
+            if self.path == '/matrices':
+                self._send_json(200, service.lci_manager.list_available_matrices())
+            elif self.path == '/metrics':
+                self._send_json(200, service.get_metrics())
+            else:
+                self._send_json(404, {'erro': 'Rota não encontrada'})
+
+        def do_POST(self):
+            try:
+                payload = self._read_json()
+            except ValueError:
+                self._send_json(400, {'erro': 'JSON inválido'})
+                return
+
+            if self.path == '/matrices':
+                if service.load_matrix(payload.get('name', ''), payload.get('file_path', '')):
+                    self._send_json(201, {'name': payload['name']})
+                else:
+                    self._send_json(400, {'erro': 'Falha ao importar arquivo'})
+            elif self.path == '/calculate':
+                try:
+                    result = service.calculate(payload.get('matrix', ''),
+                                               payload.get('transformity'))
+                except KeyError as e:
+                    self._send_json(404, {'erro': str(e.args[0])})
+                    return
+                except (TypeError, ValueError) as e:
+                    self._send_json(400, {'erro': str(e)})
+                    return
+                except Exception as e:
+                    self._send_json(500, {'erro': str(e)})
+                    return
+                # JSON estrito não representa NaN/inf (ex.: overflow na emergia)
+                if not (math.isfinite(result.total_emergy) and
+                        np.isfinite(emergy_arrays(result.process_emergy)[1]).all()):
+                    self._send_json(422, {'erro': 'Resultado não finito'})
+                    return
+                self._send_json(200, result_to_dict(result))
+            else:
+                self._send_json(404, {'erro': 'Rota não encontrada'})
+
+    return Handler
@@ -1,17 +1,117 @@
 """
 Módulo para cálculos emergéticos baseados em álgebra emergética.
 """
+import math
+import threading
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 
+from .lci_manager import compute_deltas, downcast_numeric, is_compact
+from .process_network import ProcessNetwork
+
+class ProcessEmergy(Mapping):
+    """
+    Emergia por processo armazenada em arrays.
+    
+    Comporta-se como um dicionário somente leitura {processo: emergia}, mas
+    não cria objetos Python por processo: o índice de busca por nome só é
+    construído no primeiro acesso, e names/array expõem os dados sem cópia.
+    Nomes repetidos seguem a semântica de dict(zip(nomes, valores)).
+    """
+    
+    def __init__(self, names, values: np.ndarray):
+        """
+        Inicializa o mapeamento.
+        
+        Args:
+            names: Nomes dos processos (array ou lista)
+            values: Emergia de cada processo, na mesma ordem
+        """
+        self._names = names
+        self._values = np.asarray(values, dtype=np.float64)
+        self._index: Optional[pd.Index] = None
+    
+    def _lookup(self) -> pd.Index:
+        """Retorna o índice dos nomes, removendo repetições na primeira chamada."""
+        if self._index is None:
+            # Um pd.Index recebido é usado diretamente, preservando sua tabela hash
+            index = self._names if isinstance(self._names, pd.Index) else pd.Index(self._names)
+            if not index.is_unique:
+                # Como em um dict: posição da primeira ocorrência, valor da última
+                last = ~index.duplicated(keep='last')
+                names = index[~index.duplicated(keep='first')]
+                self._values = self._values[last][index[last].get_indexer(names)]
+                index = names
+            self._names = index
+            self._index = index
+        return self._index
+    
+    @property
+    def index(self) -> pd.Index:
+        """Índice dos nomes dos processos."""
+        return self._lookup()
+    
+    @property
+    def names(self) -> np.ndarray:
+        """Nomes dos processos."""
+        return np.asarray(self._lookup(), dtype=object)
+    
+    @property
+    def array(self) -> np.ndarray:
+        """Emergia de cada processo, na ordem de names."""
+        self._lookup()
+        return self._values
+    
+    def __getitem__(self, process: str) -> float:
+        return float(self.array[self._lookup().get_loc(process)])
+    
+    def __contains__(self, process) -> bool:
+        return process in self._lookup()
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names.tolist())
+    
+    def __len__(self) -> int:
+        return len(self._lookup())
+    
+    def values(self) -> List[float]:
+        return self.array.tolist()
+    
+    def items(self) -> List[Tuple[str, float]]:
+        return list(zip(self.names.tolist(), self.array.tolist()))
+    
+    def to_dict(self) -> Dict[str, float]:
+        """Retorna uma cópia como dicionário."""
+        return dict(self.items())
+    
+    def __repr__(self) -> str:
+        return f"ProcessEmergy({len(self)} processos)"
+
+def emergy_arrays(process_emergy: Mapping[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Retorna os nomes e valores de um mapeamento de emergia como arrays.
+    
+    Args:
+        process_emergy: ProcessEmergy ou dicionário {processo: emergia}
+        
+    Returns:
+        Tupla (nomes, valores), sem cópia para ProcessEmergy
+    """
+    if isinstance(process_emergy, ProcessEmergy):
+        return process_emergy.names, process_emergy.array
+    names = np.array(list(process_emergy.keys()), dtype=object)
+    values = np.fromiter(process_emergy.values(), dtype=np.float64, count=len(process_emergy))
+    return names, values
+
 @dataclass
 class EmergyResult:
     """Classe para armazenar resultados dos cálculos emergéticos."""
     total_emergy: float
-    process_emergy: Dict[str, float]
+    process_emergy: Mapping[str, float]
     transformity: Dict[str, float]
     calculation_date: datetime
     metadata: Dict
@@ -19,8 +119,22 @@ class EmergyResult:
 class EmergyCalculator:
     """Classe responsável pelos cálculos emergéticos."""
     
-    def __init__(self):
-        """Inicializa a calculadora de emergia."""
+    # Número de processos por bloco de linhas; fixo para que o resultado
+    # não dependa do número de workers
+    BLOCK_SIZE = 65536
+    # Número máximo de valores (linhas x fluxos x cenários) em um bloco
+    BLOCK_ELEMENTS = 1 << 20
+    
+    def __init__(self, workers: int = 1):
+        """
+        Inicializa a calculadora de emergia.
+        
+        Args:
+            workers: Número de threads usadas para avaliar os blocos de linhas
+        """
+        self._workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self._transformity_factors: Dict[str, float] = {}
         self._results: Dict[str, EmergyResult] = {}
         self._default_transformity = {
@@ -39,6 +153,27 @@ class EmergyCalculator:
         """
         self._transformity_factors = {**self._default_transformity, **factors}
     
+    def set_workers(self, workers: int) -> None:
+        """
+        Define o número de threads usadas em calculate_emergy.
+        
+        Args:
+            workers: Número de threads (1 desativa o paralelismo)
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            self._workers = max(1, workers)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Retorna o pool de threads, criando-o na primeira utilização."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers,
+                                                    thread_name_prefix='scale-calc')
+            return self._executor
+    
     def calculate_emergy(self, lci_matrix: pd.DataFrame) -> EmergyResult:
         """
         Calcula a emergia total do sistema.
@@ -49,24 +184,18 @@ class EmergyCalculator:
         Returns:
             EmergyResult com os resultados dos cálculos
         """
-        # Converter a matriz para numpy array
-        matrix = lci_matrix.values
         process_names = lci_matrix['Processo'].values
+        flow_columns = [col for col in lci_matrix.columns if col != 'Processo']
         
         # Aplicar fatores de transformidade
-        transformity_array = np.array([self._transformity_factors.get(col, 1.0) 
-                                     for col in lci_matrix.columns if col != 'Processo'])
-        
-        # Calcular emergia (multiplicação elemento a elemento)
-        emergy = matrix[:, 1:] * transformity_array
+        transformity_array = self._transformity_array(flow_columns)
         
-        # Calcular emergia por processo
-        process_emergy = {}
-        for i, process in enumerate(process_names):
-            process_emergy[process] = float(np.sum(emergy[i]))
+        # Calcular emergia por processo com soma compensada, em blocos de linhas
+        row_totals = self._weighted_row_sums(lci_matrix, flow_columns, transformity_array)
+        process_emergy = ProcessEmergy(process_names, row_totals)
         
         # Calcular emergia total
-        total_emergy = float(np.sum(emergy))
+        total_emergy = math.fsum(row_totals)
         
         # Criar resultado
         result = EmergyResult(
@@ -83,6 +212,347 @@ class EmergyCalculator:
         self._results['latest'] = result
         return result
     
+    def calculate_emergy_batch(self, lci_matrix: pd.DataFrame,
+                               factor_sets: List[Dict[str, float]]) -> List[EmergyResult]:
+        """
+        Calcula a emergia de uma matriz para vários conjuntos de transformidades.
+        
+        Todos os cenários são avaliados na mesma passagem pelos blocos de
+        linhas, sem copiar a matriz. O estado da calculadora não é alterado.
+        
+        Args:
+            lci_matrix: Matriz LCI com os dados de entrada
+            factor_sets: Fatores de transformidade de cada cenário (combinados
+                com os valores padrão, como em set_transformity_factors)
+            
+        Returns:
+            Lista de EmergyResult na ordem de factor_sets
+        """
+        process_names = lci_matrix['Processo'].values
+        flow_columns = [col for col in lci_matrix.columns if col != 'Processo']
+        
+        factors = [{**self._default_transformity, **f} for f in factor_sets]
+        transformities = np.array([self._transformity_array(flow_columns, f)
+                                   for f in factors], dtype=np.float64).reshape(len(factors), -1)
+        
+        # Emergia por processo e cenário (processos x cenários)
+        row_totals = self._weighted_row_sums(lci_matrix, flow_columns, transformities)
+        
+        calculation_date = datetime.now()
+        results = []
+        for k, factor_set in enumerate(factors):
+            totals = row_totals[:, k]
+            results.append(EmergyResult(
+                total_emergy=math.fsum(totals),
+                process_emergy=ProcessEmergy(process_names, totals),
+                transformity=factor_set,
+                calculation_date=calculation_date,
+                metadata={
+                    'matrix_shape': lci_matrix.shape,
+                    'process_count': len(process_names),
+                    'batch_size': len(factors)
+                }
+            ))
+        return results
+    
+    def _transformity_array(self, flow_columns: List[str],
+                            factors: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Retorna o vetor de transformidades na ordem das colunas de fluxo."""
+        if factors is None:
+            factors = self._transformity_factors
+        return np.array([factors.get(col, 1.0) for col in flow_columns], dtype=np.float64)
+    
+    def _weighted_row_sums(self, lci_matrix: pd.DataFrame, flow_columns: List[str],
+                           transformity_array: np.ndarray) -> np.ndarray:
+        """
+        Calcula a emergia de cada processo, bloco a bloco.
+        
+        Cada bloco lê as colunas da matriz sem copiá-las (a conversão para
+        float64 ocorre na multiplicação) e grava sua parte do vetor de saída.
+        Com mais de um worker, os blocos são distribuídos entre threads; as
+        operações do NumPy liberam o GIL, e as threads compartilham a matriz.
+        O número de linhas por bloco é limitado para que cada bloco tenha no
+        máximo BLOCK_ELEMENTS valores (linhas x fluxos x cenários).
+        
+        Args:
+            lci_matrix: Matriz LCI
+            flow_columns: Colunas de fluxo, na ordem de transformity_array
+            transformity_array: Transformidade de cada coluna (fluxos) ou de
+                cada cenário e coluna (cenários x fluxos)
+            
+        Returns:
+            Vetor com a emergia de cada processo (processos x cenários no
+            caso de vários cenários)
+        """
+        columns = [lci_matrix[col].to_numpy() for col in flow_columns]
+        transformities = np.atleast_2d(transformity_array)
+        scenario_count = transformities.shape[0]
+        row_count = len(lci_matrix)
+        row_totals = np.empty((row_count, scenario_count), dtype=np.float64)
+        block_size = min(self.BLOCK_SIZE, max(
+            1, self.BLOCK_ELEMENTS // max(1, len(columns) * scenario_count)))
+        
+        def evaluate_block(start: int) -> None:
+            stop = min(start + block_size, row_count)
+            emergy = np.empty((stop - start, len(columns), scenario_count),
+                              dtype=np.float64, order='F')
+            for j, column in enumerate(columns):
+                np.multiply(column[start:stop, np.newaxis], transformities[:, j],
+                            out=emergy[:, j, :])
+            row_totals[start:stop] = self._compensated_row_sums(emergy)
+        
+        starts = range(0, row_count, block_size)
+        if self._workers == 1 or len(starts) <= 1:
+            for start in starts:
+                evaluate_block(start)
+        else:
+            # list() propaga exceções dos workers
+            list(self._get_executor().map(evaluate_block, starts))
+        return row_totals if np.ndim(transformity_array) == 2 else row_totals[:, 0]
+    
+    @staticmethod
+    def _compensated_row_sums(emergy: np.ndarray) -> np.ndarray:
+        """
+        Soma as linhas de uma matriz com soma compensada (Kahan-Neumaier) em float64.
+        
+        A soma percorre as colunas e é vetorizada sobre as linhas, o que
+        evita perda de precisão quando valores de magnitudes muito
+        diferentes (ex.: transformidades de 1 a 1e5) são acumulados.
+        
+        Args:
+            emergy: Matriz (processos x fluxos) de emergia, opcionalmente com
+                um terceiro eixo de cenários
+            
+        Returns:
+            Vetor com a soma de cada linha (processos x cenários no caso 3D)
+        """
+        shape = emergy.shape[:1] + emergy.shape[2:]
+        totals = np.zeros(shape, dtype=np.float64)
+        compensation = np.zeros(shape, dtype=np.float64)
+        for j in range(emergy.shape[1]):
+            column = emergy[:, j]
+            t = totals + column
+            with np.errstate(invalid='ignore'):
+                correction = np.where(np.abs(totals) >= np.abs(column),
+                                      (totals - t) + column,
+                                      (column - t) + totals)
+            # Com overflow (inf - inf) a correção seria NaN; mantém a soma simples
+            compensation += np.where(np.isfinite(t), correction, 0.0)
+            totals = t
+        return totals + compensation
+    
+    def validate_precision(self, lci_matrix: pd.DataFrame,
+                           compact_matrix: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Compara os resultados da matriz em precisão total com sua versão compacta.
+        
+        Para matrizes importadas em modo compacto, use
+        LCIManager.validate_compact, que relê o arquivo de origem.
+        
+        Args:
+            lci_matrix: Matriz LCI em precisão total
+            compact_matrix: Versão compacta armazenada (padrão: gerada a partir
+                de lci_matrix); os processos podem estar em outra ordem
+            
+        Returns:
+            Dicionário com o relatório de validação
+            
+        Raises:
+            ValueError: se lci_matrix já estiver em tipos compactos ou as
+                matrizes tiverem processos diferentes
+        """
+        if is_compact(lci_matrix):
+            raise ValueError("A matriz de referência já está em tipos compactos")
+        if compact_matrix is None:
+            compact_matrix = downcast_numeric(lci_matrix)
+        results = dict(self._results)
+        try:
+            full_result = self.calculate_emergy(lci_matrix)
+            compact_result = self.calculate_emergy(compact_matrix)
+        finally:
+            self._results = results
+        
+        # As linhas podem estar em outra ordem (refresh_matrix adiciona as
+        # novas ao final); alinha os resultados pelo nome do processo
+        full_names, full = emergy_arrays(full_result.process_emergy)
+        compact_names, compact = emergy_arrays(compact_result.process_emergy)
+        if not np.array_equal(full_names, compact_names):
+            positions = pd.Index(compact_names).get_indexer(full_names)
+            if len(full_names) != len(compact_names) or (positions < 0).any():
+                raise ValueError("As matrizes não contêm os mesmos processos")
+            compact = compact[positions]
+        abs_error = np.abs(compact - full)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rel_error = np.where(full != 0, abs_error / np.abs(full), 0.0)
+        
+        total_abs_error = abs(compact_result.total_emergy - full_result.total_emergy)
+        total_rel_error = (total_abs_error / abs(full_result.total_emergy)
+                           if full_result.total_emergy else 0.0)
+        
+        return {
+            'full_total_emergy': full_result.total_emergy,
+            'compact_total_emergy': compact_result.total_emergy,
+            'total_abs_error': total_abs_error,
+            'total_rel_error': total_rel_error,
+            'max_abs_error': float(abs_error.max()) if len(abs_error) else 0.0,
+            'max_rel_error': float(rel_error.max()) if len(rel_error) else 0.0,
+            'full_memory_bytes': int(lci_matrix.memory_usage(deep=False).sum()),
+            'compact_memory_bytes': int(compact_matrix.memory_usage(deep=False).sum())
+        }
+    
+    def update_emergy(self, result: EmergyResult, lci_matrix: pd.DataFrame,
+                      changes: Dict) -> EmergyResult:
+        """
+        Atualiza um resultado recalculando apenas os processos alterados.
+        
+        Args:
+            result: Resultado anterior da mesma matriz
+            lci_matrix: Matriz LCI já atualizada
+            changes: Alterações retornadas por LCIManager.refresh_matrix
+            
+        Returns:
+            Novo EmergyResult com o total ajustado pela diferença
+        """
+        if changes.get('full_reload') or result.transformity != self._transformity_factors:
+            return self.calculate_emergy(lci_matrix)
+        
+        added, removed, modified = (list(changes['added']), list(changes['removed']),
+                                    list(changes['modified']))
+        affected = added + modified
+        process_emergy = result.process_emergy
+        if isinstance(process_emergy, ProcessEmergy):
+            index, values = process_emergy.index, process_emergy.array
+        else:
+            names, values = emergy_arrays(process_emergy)
+            index = pd.Index(names)
+        
+        removed_pos = index.get_indexer(removed)
+        modified_pos = index.get_indexer(modified)
+        if (removed_pos < 0).any() or (modified_pos < 0).any():
+            return self.calculate_emergy(lci_matrix)
+        
+        deltas = (-values[removed_pos]).tolist() + (-values[modified_pos]).tolist()
+        keep = np.ones(len(index), dtype=bool)
+        keep[removed_pos] = False
+        # Posição das linhas remanescentes após a remoção
+        kept_pos = np.cumsum(keep) - 1
+        values = values.copy()
+        
+        row_totals = np.empty(0, dtype=np.float64)
+        if affected:
+            # refresh_matrix mantém a ordem das linhas e adiciona as novas ao
+            # final; confere só as linhas afetadas antes de usar as posições
+            positions = np.concatenate([np.arange(keep.sum(), keep.sum() + len(added)),
+                                        kept_pos[modified_pos]]).astype(np.intp)
+            keys = lci_matrix['Processo']
+            if (len(lci_matrix) != keep.sum() + len(added) or
+                    keys.iloc[positions].tolist() != affected):
+                positions = pd.Index(keys).get_indexer(affected)
+                if (positions < 0).any():
+                    return self.calculate_emergy(lci_matrix)
+            rows = lci_matrix.iloc[positions]
+            flow_columns = [col for col in lci_matrix.columns if col != 'Processo']
+            transformity_array = self._transformity_array(flow_columns)
+            emergy = rows[flow_columns].to_numpy(dtype=np.float64) * transformity_array
+            row_totals = self._compensated_row_sums(emergy)
+            values[modified_pos] = row_totals[len(added):]
+            deltas += row_totals.tolist()
+        
+        names = index[keep] if removed else index
+        if added:
+            names = names.append(pd.Index(added))
+        process_emergy = ProcessEmergy(names, np.concatenate([values[keep], row_totals[:len(added)]]))
+        
+        updated = EmergyResult(
+            total_emergy=math.fsum([result.total_emergy] + deltas),
+            process_emergy=process_emergy,
+            transformity=self._transformity_factors.copy(),
+            calculation_date=datetime.now(),
+            metadata={
+                'matrix_shape': lci_matrix.shape,
+                'process_count': len(names),
+                'recomputed_processes': len(affected)
+            }
+        )
+        
+        self._results['latest'] = updated
+        return updated
+    
+    def diff_results(self, result_a: EmergyResult, result_b: EmergyResult,
+                     tolerance: float = 0.0) -> pd.DataFrame:
+        """
+        Compara dois resultados processo a processo.
+        
+        Args:
+            result_a: Resultado de referência
+            result_b: Resultado comparado
+            tolerance: Diferença absoluta máxima considerada igual
+            
+        Returns:
+            DataFrame apenas com os processos alterados, com as colunas
+            'Processo', 'Emergia A', 'Emergia B', 'Delta Absoluto' e
+            'Delta Relativo'
+        """
+        keys_a, emergy_a = emergy_arrays(result_a.process_emergy)
+        keys_b, emergy_b = emergy_arrays(result_b.process_emergy)
+        keys_a, keys_b = pd.Index(keys_a), pd.Index(keys_b)
+        processes = keys_a.append(keys_b.difference(keys_a, sort=False))
+        
+        values_a = np.full(len(processes), np.nan, dtype=np.float64)
+        values_b = np.full(len(processes), np.nan, dtype=np.float64)
+        values_a[processes.get_indexer(keys_a)] = emergy_a
+        values_b[processes.get_indexer(keys_b)] = emergy_b
+        abs_delta, rel_delta, changed = compute_deltas(values_a, values_b, tolerance)
+        
+        return pd.DataFrame({
+            'Processo': processes.values[changed],
+            'Emergia A': values_a[changed],
+            'Emergia B': values_b[changed],
+            'Delta Absoluto': abs_delta[changed],
+            'Delta Relativo': rel_delta[changed]
+        })
+    
+    def calculate_propagated_emergy(self, lci_matrix: pd.DataFrame,
+                                    network: Optional[ProcessNetwork] = None) -> EmergyResult:
+        """
+        Calcula a emergia acumulada ao longo da rede de processos.
+        
+        Colunas com o nome de um processo são tratadas como consumo do seu
+        produto; as demais são recursos primários valorados por transformidade.
+        
+        Args:
+            lci_matrix: Matriz LCI com os dados de entrada
+            network: Rede já construída para esta matriz (opcional)
+            
+        Returns:
+            EmergyResult com a emergia acumulada por processo; o total é a
+            soma dos recursos primários, sem dupla contagem
+        """
+        if network is None:
+            network = ProcessNetwork.from_lci(lci_matrix)
+        resource_columns = ProcessNetwork.resource_columns(lci_matrix)
+        
+        matrix = lci_matrix[resource_columns].to_numpy(dtype=np.float64)
+        emergy = matrix * self._transformity_array(resource_columns)
+        direct = self._compensated_row_sums(emergy)
+        totals = network.propagate(direct)
+        
+        result = EmergyResult(
+            total_emergy=math.fsum(direct),
+            process_emergy=ProcessEmergy(network.processes, totals),
+            transformity=self._transformity_factors.copy(),
+            calculation_date=datetime.now(),
+            metadata={
+                'matrix_shape': lci_matrix.shape,
+                'process_count': network.node_count,
+                'edge_count': network.edge_count,
+                'propagated': True
+            }
+        )
+        
+        self._results['latest'] = result
+        return result
+    
     def calculate_network_emergy(self, 
                                input_matrix: pd.DataFrame,
                                process_matrix: pd.DataFrame) -> Tuple[EmergyResult, EmergyResult]:
@@ -131,9 +601,10 @@ class EmergyCalculator:
         """
         try:
             # Criar DataFrame com os resultados
+            names, values = emergy_arrays(result.process_emergy)
             data = {
-                'Processo': list(result.process_emergy.keys()),
-                'Emergia': list(result.process_emergy.values())
+                'Processo': names,
+                'Emergia': values
             }
             df = pd.DataFrame(data)
             
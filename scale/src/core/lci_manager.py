@@ -5,15 +5,155 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 import os
+import threading
+from collections import OrderedDict
+
+from .matrix_versions import VersionedMatrix
+
+def downcast_numeric(matrix: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas numéricas para tipos compactos.
+    
+    Colunas de ponto flutuante passam a float32 e colunas inteiras ao
+    menor tipo inteiro que comporta seus valores.
+    
+    Args:
+        matrix: DataFrame com os dados LCI
+        
+    Returns:
+        Cópia do DataFrame com os tipos reduzidos
+    """
+    compact = matrix.copy()
+    for col in compact.select_dtypes(include=[np.integer]).columns:
+        compact[col] = pd.to_numeric(compact[col], downcast='integer')
+    for col in compact.select_dtypes(include=[np.floating]).columns:
+        compact[col] = compact[col].astype(np.float32)
+    return compact
+
+def is_compact(matrix: pd.DataFrame) -> bool:
+    """
+    Indica se alguma coluna numérica usa tipo menor que 64 bits.
+    
+    Args:
+        matrix: DataFrame com os dados LCI
+        
+    Returns:
+        bool: True se a matriz contém colunas em tipos compactos
+    """
+    return any(dtype.itemsize < 8 for dtype in matrix.select_dtypes(include=[np.number]).dtypes)
+
+def compute_deltas(values_a: np.ndarray, values_b: np.ndarray,
+                   tolerance: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcula as diferenças absolutas e relativas entre dois arrays alinhados.
+    
+    Valores ausentes (NaN) são tratados como zero no delta absoluto. O delta
+    relativo é NaN quando o valor de referência é zero ou ausente.
+    
+    Args:
+        values_a: Valores de referência (float64)
+        values_b: Valores comparados (float64), com o mesmo formato
+        tolerance: Diferença absoluta máxima considerada igual
+        
+    Returns:
+        Tupla (delta absoluto, delta relativo, máscara de células alteradas)
+    """
+    missing_a = np.isnan(values_a)
+    missing_b = np.isnan(values_b)
+    abs_delta = np.where(missing_b, 0.0, values_b) - np.where(missing_a, 0.0, values_a)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rel_delta = np.where(missing_a | (values_a == 0), np.nan,
+                             abs_delta / np.abs(values_a))
+    changed = (missing_a != missing_b) | (np.abs(abs_delta) > tolerance)
+    return abs_delta, rel_delta, changed
 
 class LCIManager:
     """Classe responsável pelo gerenciamento de dados LCI."""
     
-    def __init__(self):
-        """Inicializa o gerenciador de LCI."""
+    # Número de variantes materializadas mantidas em cache
+    MATERIALIZED_CACHE_SIZE = 4
+    
+    def __init__(self, compact: bool = False):
+        """
+        Inicializa o gerenciador de LCI.
+        
+        Args:
+            compact: Se True, armazena as colunas numéricas em tipos reduzidos
+        """
         self._data: Dict[str, pd.DataFrame] = {}
         self._current_matrix: Optional[pd.DataFrame] = None
         self._metadata: Dict[str, Dict] = {}
+        self._row_hashes: Dict[str, pd.Series] = {}
+        self._versions: Dict[str, VersionedMatrix] = {}
+        # Variantes materializadas recentes: {nome: (revisão, matriz)}
+        self._materialized: 'OrderedDict[str, Tuple[int, pd.DataFrame]]' = OrderedDict()
+        self._materialize_lock = threading.Lock()
+        self._compact = compact
+    
+    def set_compact_mode(self, enabled: bool) -> None:
+        """
+        Ativa ou desativa o armazenamento compacto para as próximas importações.
+        
+        Args:
+            enabled: True para armazenar em float32/inteiros reduzidos
+        """
+        self._compact = enabled
+    
+    def is_compact(self) -> bool:
+        """
+        Indica se o modo de armazenamento compacto está ativo.
+        
+        Returns:
+            bool: True se as importações usam tipos reduzidos
+        """
+        return self._compact
+    
+    def _read_file(self, file_path: str) -> pd.DataFrame:
+        """
+        Lê um arquivo LCI (CSV, TXT ou Excel) sem validá-lo.
+        
+        Args:
+            file_path: Caminho do arquivo
+            
+        Returns:
+            DataFrame com o conteúdo do arquivo
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
+        
+        if file_path.endswith('.csv'):
+            return pd.read_csv(file_path)
+        elif file_path.endswith('.txt'):
+            # Tenta ler como CSV, se der erro tenta como tabulado
+            try:
+                return pd.read_csv(file_path)
+            except Exception:
+                return pd.read_csv(file_path, sep='\t')
+        elif file_path.endswith(('.xlsx', '.xls')):
+            return pd.read_excel(file_path)
+        else:
+            raise ValueError("Formato de arquivo não suportado")
+    
+    @staticmethod
+    def _hash_rows(matrix: pd.DataFrame) -> pd.Series:
+        """
+        Calcula o hash de cada linha indexado pela chave do processo.
+        
+        Args:
+            matrix: DataFrame com os dados LCI
+            
+        Returns:
+            Série com os hashes (uint64) indexada por 'Processo'
+        """
+        hashes = pd.util.hash_pandas_object(matrix, index=False)
+        hashes.index = matrix['Processo'].values
+        return hashes
+    
+    @staticmethod
+    def _file_signature(file_path: str) -> Tuple[int, int]:
+        """Retorna (mtime_ns, tamanho) do arquivo de origem."""
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
     
     def import_lci_file(self, file_path: str, name: str) -> bool:
         """
@@ -27,38 +167,256 @@ class LCIManager:
             bool: True se a importação foi bem-sucedida
         """
         try:
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
-            
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            elif file_path.endswith('.txt'):
-                # Tenta ler como CSV, se der erro tenta como tabulado
-                try:
-                    df = pd.read_csv(file_path)
-                except Exception:
-                    df = pd.read_csv(file_path, sep='\t')
-            elif file_path.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError("Formato de arquivo não suportado")
+            df = self._read_file(file_path)
             
             if not self.validate_matrix(df):
                 raise ValueError("Matriz LCI inválida")
             
+            row_hashes = self._hash_rows(df)
+            full_memory = int(df.memory_usage(deep=False).sum())
+            if self._compact:
+                df = downcast_numeric(df)
+            
             self._data[name] = df
             self._current_matrix = df
+            self._row_hashes[name] = row_hashes
             self._metadata[name] = {
                 'file_path': file_path,
                 'import_date': pd.Timestamp.now(),
                 'rows': len(df),
-                'columns': len(df.columns)
+                'columns': len(df.columns),
+                'compact': self._compact,
+                'memory_bytes': int(df.memory_usage(deep=False).sum()),
+                'full_memory_bytes': full_memory,
+                'file_signature': self._file_signature(file_path)
             }
             return True
         except Exception as e:
             print(f"Erro ao importar arquivo: {str(e)}")
             return False
     
+    def refresh_matrix(self, name: str) -> Optional[Dict]:
+        """
+        Relê o arquivo de origem e aplica apenas as linhas alteradas.
+        
+        As linhas são comparadas pelo hash, usando 'Processo' como chave.
+        Se o conjunto de colunas mudou ou há chaves duplicadas, a matriz
+        inteira é substituída e todas as linhas são reportadas.
+        
+        Args:
+            name: Nome da matriz a ser atualizada
+            
+        Returns:
+            Dicionário com as listas 'added', 'removed' e 'modified'
+            (e 'full_reload'), ou None em caso de erro
+        """
+        try:
+            metadata = self._metadata.get(name)
+            if metadata is None:
+                return None
+            
+            file_path = metadata['file_path']
+            new_df = self._read_file(file_path)
+            if not self.validate_matrix(new_df):
+                raise ValueError("Matriz LCI inválida")
+            
+            old_matrix = self._data[name]
+            old_hashes = self._row_hashes[name]
+            new_hashes = self._hash_rows(new_df)
+            
+            full_reload = (list(new_df.columns) != list(old_matrix.columns)
+                           or not old_hashes.index.is_unique
+                           or not new_hashes.index.is_unique)
+            if full_reload:
+                changes = {
+                    'added': list(new_hashes.index),
+                    'removed': list(old_hashes.index),
+                    'modified': [],
+                    'full_reload': True
+                }
+                matrix = downcast_numeric(new_df) if self._compact else new_df
+            else:
+                changes = self._diff_row_hashes(old_hashes, new_hashes)
+                matrix = self._apply_row_changes(old_matrix, new_df, changes)
+            
+            self._data[name] = matrix
+            if self._current_matrix is old_matrix:
+                self._current_matrix = matrix
+            self._row_hashes[name] = new_hashes
+            metadata.update({
+                'import_date': pd.Timestamp.now(),
+                'rows': len(matrix),
+                'columns': len(matrix.columns),
+                'memory_bytes': int(matrix.memory_usage(deep=False).sum()),
+                'full_memory_bytes': int(new_df.memory_usage(deep=False).sum()),
+                'file_signature': self._file_signature(file_path)
+            })
+            return changes
+        except Exception as e:
+            print(f"Erro ao atualizar matriz: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _diff_row_hashes(old_hashes: pd.Series, new_hashes: pd.Series) -> Dict:
+        """
+        Compara dois conjuntos de hashes de linha indexados pela chave do processo.
+        
+        Returns:
+            Dicionário com as listas 'added', 'removed' e 'modified'
+        """
+        old_keys = old_hashes.index
+        new_keys = new_hashes.index
+        common = new_keys.intersection(old_keys, sort=False)
+        changed = old_hashes.loc[common].values != new_hashes.loc[common].values
+        return {
+            'added': list(new_keys.difference(old_keys, sort=False)),
+            'removed': list(old_keys.difference(new_keys, sort=False)),
+            'modified': list(common[changed]),
+            'full_reload': False
+        }
+    
+    def _apply_row_changes(self, matrix: pd.DataFrame, new_df: pd.DataFrame,
+                           changes: Dict) -> pd.DataFrame:
+        """
+        Aplica as linhas incluídas, removidas e alteradas à matriz armazenada.
+        
+        As linhas existentes mantêm sua ordem; as novas são adicionadas ao final.
+        """
+        if not (changes['added'] or changes['removed'] or changes['modified']):
+            return matrix
+        
+        keyed = matrix.set_index('Processo')
+        new_keyed = new_df.set_index('Processo')
+        
+        if changes['removed']:
+            keyed = keyed.drop(index=changes['removed'])
+        if changes['modified']:
+            # Alarga os tipos compactos antes de receber os novos valores
+            widened = {col: dtype for col, dtype in new_keyed.dtypes.items()
+                       if keyed[col].dtype != dtype}
+            if widened:
+                keyed = keyed.astype(widened)
+            keyed.loc[changes['modified']] = new_keyed.loc[changes['modified']]
+        if changes['added']:
+            keyed = pd.concat([keyed, new_keyed.loc[changes['added']]])
+        
+        updated = keyed.reset_index()
+        return downcast_numeric(updated) if self._compact else updated
+    
+    def check_for_updates(self) -> Dict[str, Dict]:
+        """
+        Verifica os arquivos de origem importados e atualiza os que mudaram.
+        
+        A detecção usa a data de modificação e o tamanho do arquivo; apenas
+        os arquivos alterados são relidos.
+        
+        Returns:
+            Dicionário {nome da matriz: alterações} para as matrizes atualizadas
+        """
+        updates = {}
+        for name, metadata in self._metadata.items():
+            if 'base' in metadata:
+                continue
+            try:
+                signature = self._file_signature(metadata['file_path'])
+            except OSError:
+                continue
+            if signature == metadata.get('file_signature'):
+                continue
+            changes = self.refresh_matrix(name)
+            if changes is not None:
+                updates[name] = changes
+        return updates
+    
+    def validate_compact(self, name: str, calculator) -> Optional[Dict]:
+        """
+        Compara a matriz compacta armazenada com o arquivo de origem em precisão total.
+        
+        O arquivo é relido e conferido com os hashes de linha da importação;
+        se mudou desde então, o relatório não é gerado.
+        
+        Args:
+            name: Nome da matriz importada
+            calculator: EmergyCalculator com os fatores de transformidade
+            
+        Returns:
+            Relatório de EmergyCalculator.validate_precision, ou None em caso de erro
+        """
+        try:
+            matrix = self._data.get(name)
+            if matrix is None:
+                raise ValueError(f"Matriz não encontrada: {name}")
+            
+            full = self._read_file(self._metadata[name]['file_path'])
+            if not self._hash_rows(full).sort_index().equals(self._row_hashes[name].sort_index()):
+                raise ValueError("O arquivo de origem mudou desde a importação")
+            
+            return calculator.validate_precision(full, matrix)
+        except Exception as e:
+            print(f"Erro ao validar matriz compacta: {str(e)}")
+            return None
+    
+    def diff(self, a, b, tolerance: float = 0.0) -> Optional[pd.DataFrame]:
+        """
+        Compara duas matrizes LCI célula a célula.
+        
+        As matrizes são alinhadas pelos índices de processo ('Processo') e
+        de fluxo (colunas numéricas); processos ou fluxos presentes em apenas
+        uma delas aparecem com o valor ausente (NaN) do outro lado.
+        
+        Args:
+            a: Nome ou DataFrame da matriz de referência
+            b: Nome ou DataFrame da matriz comparada
+            tolerance: Diferença absoluta máxima considerada igual
+            
+        Returns:
+            DataFrame esparso (uma linha por célula alterada) com as colunas
+            'Processo', 'Fluxo', 'Valor A', 'Valor B', 'Delta Absoluto' e
+            'Delta Relativo', ou None em caso de erro
+        """
+        try:
+            matrix_a = self.get_matrix(a) if isinstance(a, str) else a
+            matrix_b = self.get_matrix(b) if isinstance(b, str) else b
+            if matrix_a is None or matrix_b is None:
+                raise ValueError("Matriz não encontrada")
+            
+            keys_a = pd.Index(matrix_a['Processo'])
+            keys_b = pd.Index(matrix_b['Processo'])
+            if not (keys_a.is_unique and keys_b.is_unique):
+                raise ValueError("Chaves de processo duplicadas")
+            
+            flows_a = pd.Index(matrix_a.columns.drop('Processo'))
+            flows_b = pd.Index(matrix_b.columns.drop('Processo'))
+            processes = keys_a.append(keys_b.difference(keys_a, sort=False))
+            flows = flows_a.append(flows_b.difference(flows_a, sort=False))
+            
+            values_a = self._aligned_values(matrix_a, keys_a, flows_a, processes, flows)
+            values_b = self._aligned_values(matrix_b, keys_b, flows_b, processes, flows)
+            abs_delta, rel_delta, changed = compute_deltas(values_a, values_b, tolerance)
+            
+            rows, cols = np.nonzero(changed)
+            return pd.DataFrame({
+                'Processo': processes.values[rows],
+                'Fluxo': flows.values[cols],
+                'Valor A': values_a[rows, cols],
+                'Valor B': values_b[rows, cols],
+                'Delta Absoluto': abs_delta[rows, cols],
+                'Delta Relativo': rel_delta[rows, cols]
+            })
+        except Exception as e:
+            print(f"Erro ao comparar matrizes: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _aligned_values(matrix: pd.DataFrame, keys: pd.Index, flows: pd.Index,
+                        processes: pd.Index, all_flows: pd.Index) -> np.ndarray:
+        """Projeta o bloco numérico da matriz nos índices unificados (NaN se ausente)."""
+        values = np.full((len(processes), len(all_flows)), np.nan, dtype=np.float64)
+        row_pos = processes.get_indexer(keys)
+        col_pos = all_flows.get_indexer(flows)
+        values[np.ix_(row_pos, col_pos)] = matrix[list(flows)].to_numpy(dtype=np.float64)
+        return values
+    
     def get_matrix(self, name: Optional[str] = None) -> Optional[pd.DataFrame]:
         """
         Retorna a matriz LCI especificada ou a atual.
@@ -70,9 +428,85 @@ class LCIManager:
             DataFrame com os dados LCI
         """
         if name:
+            if name in self._versions:
+                return self._materialize_variant(name)
             return self._data.get(name)
         return self._current_matrix
     
+    def _materialize_variant(self, name: str) -> pd.DataFrame:
+        """
+        Materializa a versão atual de uma variante.
+        
+        As colunas sem edições são visões dos blocos compartilhados; as
+        últimas MATERIALIZED_CACHE_SIZE variantes materializadas ficam em
+        cache. Pode ser chamado de várias threads (ex.: CalculationService).
+        """
+        with self._materialize_lock:
+            variant = self._versions[name]
+            cached = self._materialized.get(name)
+            if cached is None or cached[0] != variant.revision:
+                # materialize percorre o histórico da variante; o lock também
+                # impede que duas threads façam isso ao mesmo tempo
+                cached = (variant.revision, variant.materialize())
+                self._materialized[name] = cached
+            self._materialized.move_to_end(name)
+            while len(self._materialized) > self.MATERIALIZED_CACHE_SIZE:
+                self._materialized.popitem(last=False)
+            return cached[1]
+    
+    def create_variant(self, base_name: str, variant_name: str) -> bool:
+        """
+        Cria uma variante de uma matriz para análises "e se".
+        
+        A variante compartilha os blocos de coluna inalterados com a matriz
+        de origem; apenas as edições ocupam memória adicional.
+        
+        Args:
+            base_name: Nome da matriz ou variante de origem
+            variant_name: Nome da nova variante
+            
+        Returns:
+            bool: True se a variante foi criada
+        """
+        if variant_name in self._data or variant_name in self._versions:
+            return False
+        if base_name in self._versions:
+            variant = self._versions[base_name].branch()
+        elif base_name in self._data:
+            variant = VersionedMatrix(self._data[base_name])
+        else:
+            return False
+        
+        self._versions[variant_name] = variant
+        base_metadata = self._metadata.get(base_name, {})
+        self._metadata[variant_name] = {
+            'file_path': base_metadata.get('file_path'),
+            'import_date': pd.Timestamp.now(),
+            'base': base_name
+        }
+        self._update_variant_shape(variant_name)
+        return True
+    
+    def _update_variant_shape(self, name: str) -> None:
+        """Atualiza linhas e colunas nos metadados de uma variante."""
+        variant = self._versions[name]
+        self._metadata[name].update({
+            'rows': variant.row_count(),
+            'columns': len(variant.flows()) + 1
+        })
+    
+    def get_variant(self, name: str) -> Optional[VersionedMatrix]:
+        """
+        Retorna a matriz versionada de uma variante para edição e desfazer/refazer.
+        
+        Args:
+            name: Nome da variante
+            
+        Returns:
+            VersionedMatrix ou None se a variante não existir
+        """
+        return self._versions.get(name)
+    
     def list_available_matrices(self) -> List[str]:
         """
         Lista todas as matrizes LCI disponíveis.
@@ -80,7 +514,7 @@ class LCIManager:
         Returns:
             Lista com os nomes das matrizes
         """
-        return list(self._data.keys())
+        return list(self._data.keys()) + list(self._versions.keys())
     
     def validate_matrix(self, matrix: pd.DataFrame) -> bool:
         """
@@ -125,7 +559,7 @@ class LCIManager:
             bool: True se a exportação foi bem-sucedida
         """
         try:
-            matrix = self._data.get(name)
+            matrix = self.get_matrix(name) if name else None
             if matrix is None:
                 return False
             
@@ -151,6 +585,8 @@ class LCIManager:
         Returns:
             Dicionário com os metadados
         """
+        if name in self._versions:
+            self._update_variant_shape(name)
         return self._metadata.get(name)
     
     def get_matrix_summary(self, name: Optional[str] = None) -> Dict:
@@ -0,0 +1,417 @@
+"""
+Módulo para versões de matrizes LCI com cópia sob demanda (copy-on-write).
+"""
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+
+# Marca células sem edição anterior no registro de desfazer
+_MISSING = object()
+
+@dataclass(frozen=True, eq=False)
+class MatrixVersion:
+    """
+    Estado imutável de uma matriz LCI, usado como base de uma VersionedMatrix.
+
+    Os blocos de coluna e o índice de processos são compartilhados com a
+    matriz de origem; as edições ficam em camadas leves (células alteradas,
+    linhas removidas e linhas adicionadas).
+    """
+    processes: pd.Index
+    columns: Dict[str, np.ndarray]
+    overlays: Dict[str, Dict[int, float]] = field(default_factory=dict)
+    removed_rows: frozenset = frozenset()
+    added_rows: Tuple[Tuple[str, Dict[str, float]], ...] = ()
+
+class VersionedMatrix:
+    """
+    Matriz LCI versionada com histórico de desfazer/refazer.
+
+    O estado atual é mantido em camadas mutáveis sobre os blocos de coluna
+    compartilhados, e o histórico guarda apenas o delta de cada edição
+    (valor novo e anterior), de modo que a memória cresce linearmente com
+    o número de edições.
+    """
+
+    # Fração de células editadas a partir da qual a camada é incorporada à coluna
+    OVERLAY_FOLD_RATIO = 0.05
+
+    def __init__(self, matrix: Optional[pd.DataFrame] = None,
+                 version: Optional[MatrixVersion] = None):
+        """
+        Inicializa a matriz versionada.
+
+        Args:
+            matrix: Matriz LCI de origem (as colunas não são copiadas)
+            version: Versão inicial, usada no lugar de matrix
+        """
+        if version is None:
+            if matrix is None:
+                raise ValueError("Informe uma matriz ou uma versão inicial")
+            version = MatrixVersion(
+                processes=pd.Index(matrix['Processo']),
+                columns={col: matrix[col].to_numpy()
+                         for col in matrix.columns if col != 'Processo'}
+            )
+        self._processes = version.processes
+        self._columns: Dict[str, np.ndarray] = dict(version.columns)
+        self._overlays: Dict[str, Dict[int, float]] = {
+            flow: dict(cells) for flow, cells in version.overlays.items()}
+        self._removed = set(version.removed_rows)
+        self._added: List[list] = [[name, dict(row)] for name, row in version.added_rows]
+
+        self._history: List[Tuple[Callable[[], None], Callable[[], None]]] = []
+        self._position = 0
+        self._revision = 0
+
+    @property
+    def revision(self) -> int:
+        """Contador alterado a cada edição, desfazer ou refazer."""
+        return self._revision
+
+    def snapshot(self) -> MatrixVersion:
+        """
+        Retorna o estado atual como versão imutável.
+
+        Os blocos de coluna são compartilhados; apenas as camadas de edição
+        são copiadas.
+        """
+        return MatrixVersion(
+            processes=self._processes,
+            columns=dict(self._columns),
+            overlays={flow: dict(cells) for flow, cells in self._overlays.items()},
+            removed_rows=frozenset(self._removed),
+            added_rows=tuple((name, dict(row)) for name, row in self._added)
+        )
+
+    def history_size(self) -> int:
+        """Retorna o número de versões no histórico (incluindo a inicial)."""
+        return len(self._history) + 1
+
+    def _record(self, apply: Callable[[], None], revert: Callable[[], None]) -> None:
+        """Aplica uma edição e a registra, descartando o histórico de refazer."""
+        del self._history[self._position:]
+        apply()
+        self._history.append((apply, revert))
+        self._position += 1
+        self._revision += 1
+
+    def can_undo(self) -> bool:
+        """Indica se há uma edição a desfazer."""
+        return self._position > 0
+
+    def can_redo(self) -> bool:
+        """Indica se há uma edição a refazer."""
+        return self._position < len(self._history)
+
+    def undo(self) -> bool:
+        """
+        Desfaz a última edição.
+
+        Returns:
+            bool: True se havia uma edição a desfazer
+        """
+        if not self.can_undo():
+            return False
+        self._position -= 1
+        self._history[self._position][1]()
+        self._revision += 1
+        return True
+
+    def redo(self) -> bool:
+        """
+        Refaz a última edição desfeita.
+
+        Returns:
+            bool: True se havia uma edição a refazer
+        """
+        if not self.can_redo():
+            return False
+        self._history[self._position][0]()
+        self._position += 1
+        self._revision += 1
+        return True
+
+    def branch(self) -> 'VersionedMatrix':
+        """
+        Cria uma variante a partir da versão atual.
+
+        A variante compartilha todos os blocos de coluna com esta matriz e
+        possui histórico próprio.
+        """
+        return VersionedMatrix(version=self.snapshot())
+
+    def flows(self) -> List[str]:
+        """Retorna as colunas de fluxo da versão atual."""
+        return list(self._columns.keys())
+
+    def row_count(self) -> int:
+        """Retorna o número de processos da versão atual."""
+        return len(self._processes) - len(self._removed) + len(self._added)
+
+    def _locate(self, process: str) -> Union[int, Tuple[list]]:
+        """
+        Localiza um processo na versão atual.
+
+        Returns:
+            Posição da linha base (int) ou (entrada,) de uma linha adicionada
+        """
+        for entry in self._added:
+            if entry[0] == process:
+                return (entry,)
+        if process in self._processes:
+            pos = self._processes.get_loc(process)
+            if isinstance(pos, int) and pos not in self._removed:
+                return pos
+        raise KeyError(f"Processo não encontrado: {process}")
+
+    def _check_flows(self, flows) -> None:
+        """Verifica se todas as colunas de fluxo existem."""
+        for flow in flows:
+            if flow not in self._columns:
+                raise KeyError(f"Fluxo não encontrado: {flow}")
+
+    def _set_cells(self, process: str, values: Dict[str, float]) -> None:
+        """Registra a alteração das células de um processo existente."""
+        self._check_flows(values)
+        pos = self._locate(process)
+
+        if isinstance(pos, tuple):
+            row = pos[0][1]
+            old = {flow: row[flow] for flow in values}
+            self._record(lambda: row.update(values), lambda: row.update(old))
+            return
+
+        old = {flow: self._overlays.get(flow, {}).get(pos, _MISSING) for flow in values}
+        folded: Dict[str, Tuple[np.ndarray, Dict[int, float]]] = {}
+
+        def apply():
+            limit = self.OVERLAY_FOLD_RATIO * len(self._processes)
+            for flow, value in values.items():
+                cells = self._overlays.setdefault(flow, {})
+                cells[pos] = value
+                if len(cells) > limit:
+                    # Incorpora a camada em um novo bloco; o anterior fica no histórico
+                    folded[flow] = (self._columns[flow], cells)
+                    self._columns[flow] = self._apply_overlay(self._columns[flow], cells)
+                    self._overlays[flow] = {}
+
+        def revert():
+            for flow, (column, cells) in folded.items():
+                self._columns[flow] = column
+                self._overlays[flow] = cells
+            folded.clear()
+            for flow, value in old.items():
+                if value is _MISSING:
+                    self._overlays[flow].pop(pos, None)
+                else:
+                    self._overlays[flow][pos] = value
+
+        self._record(apply, revert)
+
+    def set_cell(self, process: str, flow: str, value: float) -> None:
+        """
+        Altera o valor de uma célula.
+
+        Args:
+            process: Chave do processo
+            flow: Nome da coluna de fluxo
+            value: Novo valor
+        """
+        self._set_cells(process, {flow: value})
+
+    def set_row(self, process: str, values: Dict[str, float]) -> None:
+        """
+        Altera as células de um processo ou o adiciona se não existir.
+
+        Args:
+            process: Chave do processo
+            values: Dicionário {fluxo: valor}; fluxos omitidos em um novo
+                processo recebem 0
+        """
+        try:
+            self._locate(process)
+        except KeyError:
+            self._check_flows(values)
+            entry = [process, {flow: values.get(flow, 0.0) for flow in self._columns}]
+            self._record(lambda: self._added.append(entry), lambda: self._added.pop())
+            return
+        self._set_cells(process, values)
+
+    def remove_row(self, process: str) -> None:
+        """
+        Remove um processo.
+
+        Args:
+            process: Chave do processo
+        """
+        pos = self._locate(process)
+        if isinstance(pos, tuple):
+            entry = pos[0]
+            index = self._added.index(entry)
+            self._record(lambda: self._added.pop(index),
+                         lambda: self._added.insert(index, entry))
+        else:
+            self._record(lambda: self._removed.add(pos),
+                         lambda: self._removed.discard(pos))
+
+    def set_column(self, flow: str, values) -> None:
+        """
+        Substitui ou adiciona uma coluna de fluxo.
+
+        Args:
+            flow: Nome da coluna
+            values: Valores na ordem das linhas da versão materializada
+        """
+        values = np.asarray(values)
+        kept = self._kept_positions()
+        if len(values) != len(kept) + len(self._added):
+            raise ValueError("Número de valores diferente do número de processos")
+
+        base_values = values[:len(kept)]
+        old_column = self._columns.get(flow)
+        old_cells = self._overlays.get(flow)
+        if len(kept) == len(self._processes):
+            column = base_values.copy()
+        else:
+            # Linhas removidas mantêm o valor anterior (ou 0 em coluna nova)
+            column = (np.zeros(len(self._processes), dtype=base_values.dtype)
+                      if old_column is None else
+                      self._apply_overlay(old_column, old_cells or {}))
+            column = column.astype(np.result_type(column.dtype, base_values.dtype))
+            column[kept] = base_values
+
+        entries = list(self._added)
+        new_values = values[len(kept):].tolist()
+        old_values = [entry[1].get(flow, _MISSING) for entry in entries]
+
+        def apply():
+            self._columns[flow] = column
+            self._overlays.pop(flow, None)
+            for entry, value in zip(entries, new_values):
+                entry[1][flow] = value
+
+        def revert():
+            if old_column is None:
+                del self._columns[flow]
+            else:
+                self._columns[flow] = old_column
+            if old_cells is not None:
+                self._overlays[flow] = old_cells
+            for entry, value in zip(entries, old_values):
+                if value is _MISSING:
+                    entry[1].pop(flow, None)
+                else:
+                    entry[1][flow] = value
+
+        self._record(apply, revert)
+
+    def remove_column(self, flow: str) -> None:
+        """
+        Remove uma coluna de fluxo.
+
+        Args:
+            flow: Nome da coluna
+        """
+        self._check_flows([flow])
+        order = list(self._columns)
+        old_column = self._columns[flow]
+        old_cells = self._overlays.get(flow)
+        entries = list(self._added)
+        old_values = [entry[1].get(flow) for entry in entries]
+
+        def apply():
+            del self._columns[flow]
+            self._overlays.pop(flow, None)
+            for entry in entries:
+                entry[1].pop(flow, None)
+
+        def revert():
+            self._columns = {col: old_column if col == flow else self._columns[col]
+                             for col in order}
+            if old_cells is not None:
+                self._overlays[flow] = old_cells
+            for entry, value in zip(entries, old_values):
+                entry[1][flow] = value
+
+        self._record(apply, revert)
+
+    def _kept_positions(self) -> np.ndarray:
+        """Posições das linhas base que não foram removidas."""
+        if not self._removed:
+            return np.arange(len(self._processes))
+        mask = np.ones(len(self._processes), dtype=bool)
+        mask[list(self._removed)] = False
+        return np.flatnonzero(mask)
+
+    @staticmethod
+    def _apply_overlay(column: np.ndarray, cells: Dict[int, float]) -> np.ndarray:
+        """Retorna uma cópia da coluna com as células editadas aplicadas."""
+        if not cells:
+            return column
+        positions = np.fromiter(cells.keys(), dtype=np.intp, count=len(cells))
+        values = np.fromiter(cells.values(), dtype=np.float64, count=len(cells))
+        dtype = column.dtype
+        # Colunas inteiras compactas são alargadas se o novo valor não couber
+        if dtype.kind in 'iub' and not np.array_equal(values.astype(dtype), values):
+            dtype = np.result_type(dtype, values.dtype)
+        result = column.astype(dtype, copy=True)
+        result[positions] = values
+        return result
+
+    @staticmethod
+    def _read_only(column: np.ndarray) -> np.ndarray:
+        """Retorna uma visão somente leitura de um bloco compartilhado."""
+        view = column.view()
+        view.flags.writeable = False
+        return view
+
+    def materialize(self, position: Optional[int] = None) -> pd.DataFrame:
+        """
+        Gera o DataFrame de uma versão.
+
+        Colunas sem edições e sem linhas removidas são visões somente leitura
+        dos blocos compartilhados, sem cópia.
+
+        Args:
+            position: Posição no histórico (padrão: versão atual)
+
+        Returns:
+            DataFrame no formato LCI, com a coluna 'Processo'
+        """
+        if position is not None and position != self._position:
+            if not 0 <= position <= len(self._history):
+                raise IndexError("Posição fora do histórico")
+            current, revision = self._position, self._revision
+            try:
+                while self._position > position:
+                    self.undo()
+                while self._position < position:
+                    self.redo()
+                return self.materialize()
+            finally:
+                while self._position > current:
+                    self.undo()
+                while self._position < current:
+                    self.redo()
+                self._revision = revision
+
+        kept = self._kept_positions()
+        full = len(kept) == len(self._processes)
+
+        data = {'Processo': self._processes.values if full
+                else self._processes.values[kept]}
+        for flow, column in self._columns.items():
+            cells = self._overlays.get(flow)
+            if cells:
+                column = self._apply_overlay(column, cells)
+            data[flow] = (column[kept] if not full
+                          else self._read_only(column) if not cells else column)
+        matrix = pd.DataFrame(data, copy=False)
+
+        if self._added:
+            added = pd.DataFrame([{'Processo': name, **row} for name, row in self._added],
+                                 columns=matrix.columns)
+            matrix = pd.concat([matrix, added], ignore_index=True)
+        return matrix
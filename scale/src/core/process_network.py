@@ -0,0 +1,324 @@
+"""
+Módulo com o modelo de rede de processos construído a partir de dados LCI.
+
+Uma coluna de fluxo cujo nome coincide com o de um processo representa o
+consumo do produto desse processo (fornecedor) pela linha (consumidor).
+As demais colunas são recursos primários, valorados por transformidade.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+class ProcessNetwork:
+    """Grafo de processos em formato CSR (fornecedores de cada consumidor)."""
+
+    # Níveis com menos nós que isso são processados em laço Python, que é
+    # mais rápido que uma rodada vetorizada para cadeias longas e estreitas
+    NARROW_LEVEL = 64
+
+    def __init__(self, processes: pd.Index, indptr: np.ndarray,
+                 indices: np.ndarray, weights: np.ndarray):
+        """
+        Inicializa a rede.
+
+        Args:
+            processes: Índice com as chaves dos processos (nós)
+            indptr: Ponteiros CSR por consumidor (tamanho n + 1)
+            indices: Fornecedor de cada aresta
+            weights: Quantidade consumida em cada aresta
+        """
+        self.processes = processes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self._levels: Optional[List[np.ndarray]] = None
+
+    @classmethod
+    def from_lci(cls, lci_matrix: pd.DataFrame) -> 'ProcessNetwork':
+        """
+        Constrói a rede a partir de uma matriz LCI.
+
+        Args:
+            lci_matrix: Matriz LCI com a coluna 'Processo'
+
+        Returns:
+            ProcessNetwork com uma aresta por célula não nula entre processos
+        """
+        processes = pd.Index(lci_matrix['Processo'])
+        if not processes.is_unique:
+            raise ValueError("Chaves de processo duplicadas")
+
+        supplier_columns = [col for col in lci_matrix.columns
+                            if col != 'Processo' and col in processes]
+
+        # Percorre coluna a coluna, sem copiar o bloco de fornecedores
+        consumers, suppliers, weights = [], [], []
+        for col, supplier in zip(supplier_columns, processes.get_indexer(supplier_columns)):
+            column = lci_matrix[col].to_numpy()
+            rows = np.flatnonzero(column)
+            consumers.append(rows)
+            suppliers.append(np.full(len(rows), supplier, dtype=np.intp))
+            weights.append(column[rows].astype(np.float64))
+
+        if consumers:
+            consumers = np.concatenate(consumers)
+            order = np.argsort(consumers, kind='stable')
+            consumers = consumers[order]
+            suppliers = np.concatenate(suppliers)[order]
+            weights = np.concatenate(weights)[order]
+        else:
+            consumers = suppliers = np.empty(0, dtype=np.intp)
+            weights = np.empty(0, dtype=np.float64)
+
+        counts = np.bincount(consumers, minlength=len(processes))
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        return cls(processes, indptr, suppliers, weights)
+
+    @staticmethod
+    def resource_columns(lci_matrix: pd.DataFrame) -> List[str]:
+        """Retorna as colunas de recursos primários (que não são processos)."""
+        processes = set(lci_matrix['Processo'])
+        return [col for col in lci_matrix.columns
+                if col != 'Processo' and col not in processes]
+
+    @property
+    def node_count(self) -> int:
+        """Número de processos."""
+        return len(self.processes)
+
+    @property
+    def edge_count(self) -> int:
+        """Número de arestas."""
+        return len(self.indices)
+
+    def _topological_levels(self) -> List[np.ndarray]:
+        """
+        Agrupa os nós em níveis (algoritmo de Kahn): cada nível depende
+        apenas dos anteriores. Nós em ciclos ficam de fora.
+        """
+        if self._levels is not None:
+            return self._levels
+
+        consumers = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        down_indptr = np.concatenate(([0], np.cumsum(
+            np.bincount(self.indices, minlength=self.node_count))))
+        down_consumers = consumers[order]
+
+        pending = np.diff(self.indptr).copy()
+        level = np.flatnonzero(pending == 0)
+        levels = []
+        while len(level) >= self.NARROW_LEVEL:
+            levels.append(level)
+            counts = down_indptr[level + 1] - down_indptr[level]
+            edges = self._expand_ranges(down_indptr[level], counts)
+            reached = down_consumers[edges]
+            np.subtract.at(pending, reached, 1)
+            candidates = np.unique(reached)
+            level = candidates[pending[candidates] == 0]
+
+        if len(level):
+            levels.extend(self._narrow_levels(level, pending, down_indptr, down_consumers))
+
+        self._levels = levels
+        return levels
+
+    def _narrow_levels(self, frontier: np.ndarray, pending: np.ndarray,
+                       down_indptr: np.ndarray, down_consumers: np.ndarray) -> List[np.ndarray]:
+        """
+        Continua o algoritmo de Kahn em laço Python a partir de uma fronteira.
+
+        O nível de cada nó é a maior profundidade de seus fornecedores mais
+        um, contada a partir da fronteira.
+        """
+        pending = pending.tolist()
+        down_indptr = down_indptr.tolist()
+        down_consumers = down_consumers.tolist()
+        depth = [0] * self.node_count
+        queue = frontier.tolist()
+
+        i = 0
+        while i < len(queue):
+            node = queue[i]
+            i += 1
+            next_depth = depth[node] + 1
+            for k in range(down_indptr[node], down_indptr[node + 1]):
+                consumer = down_consumers[k]
+                if depth[consumer] < next_depth:
+                    depth[consumer] = next_depth
+                pending[consumer] -= 1
+                if pending[consumer] == 0:
+                    queue.append(consumer)
+
+        nodes = np.array(queue, dtype=np.intp)
+        depths = np.array(depth, dtype=np.intp)[nodes]
+        order = np.argsort(depths, kind='stable')
+        bounds = np.flatnonzero(np.diff(depths[order])) + 1
+        return np.split(nodes[order], bounds)
+
+    @staticmethod
+    def _expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Concatena os intervalos [start, start + count) em um único array."""
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.intp)
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(total)
+
+    def topological_order(self) -> List[str]:
+        """
+        Retorna os processos com cada fornecedor antes de seus consumidores.
+
+        Raises:
+            ValueError: se a rede contém ciclos
+        """
+        levels = self._topological_levels()
+        order = np.concatenate(levels) if levels else np.empty(0, dtype=np.intp)
+        if len(order) != self.node_count:
+            raise ValueError("A rede de processos contém ciclos")
+        return list(self.processes.values[order])
+
+    def find_cycles(self) -> List[str]:
+        """
+        Retorna os processos que participam de ciclos ou dependem deles.
+
+        Returns:
+            Lista vazia se a rede for acíclica
+        """
+        ordered = np.zeros(self.node_count, dtype=bool)
+        for level in self._topological_levels():
+            ordered[level] = True
+        return list(self.processes.values[~ordered])
+
+    def has_cycles(self) -> bool:
+        """Indica se a rede contém ciclos."""
+        return sum(len(level) for level in self._topological_levels()) != self.node_count
+
+    def propagate(self, direct_emergy: np.ndarray) -> np.ndarray:
+        """
+        Propaga a emergia dos fornecedores para os consumidores.
+
+        A emergia de cada processo é a sua emergia direta somada à emergia
+        acumulada de cada fornecedor ponderada pela quantidade consumida.
+        Os nós são avaliados nível a nível, de modo que cada subcadeia
+        compartilhada é calculada uma única vez.
+
+        Args:
+            direct_emergy: Emergia direta (recursos primários) de cada processo
+
+        Returns:
+            Emergia acumulada de cada processo
+
+        Raises:
+            ValueError: se a rede contém ciclos
+        """
+        if self.has_cycles():
+            raise ValueError("A rede de processos contém ciclos")
+
+        totals = np.asarray(direct_emergy, dtype=np.float64).copy()
+        values = None
+        csr = None
+        for level in self._topological_levels()[1:]:
+            if len(level) < self.NARROW_LEVEL:
+                # Níveis estreitos: laço Python sobre listas, sem rodada numpy
+                if values is None:
+                    values = totals.tolist()
+                if csr is None:
+                    csr = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+                indptr, indices, weights = csr
+                for node in level.tolist():
+                    acc = values[node]
+                    for k in range(indptr[node], indptr[node + 1]):
+                        acc += weights[k] * values[indices[k]]
+                    values[node] = acc
+                continue
+
+            if values is not None:
+                totals = np.array(values, dtype=np.float64)
+                values = None
+            counts = self.indptr[level + 1] - self.indptr[level]
+            edges = self._expand_ranges(self.indptr[level], counts)
+            contributions = self.weights[edges] * totals[self.indices[edges]]
+            owners = np.repeat(np.arange(len(level)), counts)
+            totals[level] += np.bincount(owners, weights=contributions,
+                                         minlength=len(level))
+
+        if values is not None:
+            totals = np.array(values, dtype=np.float64)
+        return totals
+
+    def edge_emergy(self, totals: np.ndarray) -> pd.DataFrame:
+        """
+        Retorna a emergia transferida em cada aresta.
+
+        Args:
+            totals: Emergia acumulada de cada processo (ver propagate)
+
+        Returns:
+            DataFrame com as colunas 'Origem', 'Destino' e 'Emergia'
+        """
+        consumers = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        return pd.DataFrame({
+            'Origem': self.processes.values[self.indices],
+            'Destino': self.processes.values[consumers],
+            'Emergia': self.weights * totals[self.indices]
+        })
+
+    def aggregate_flows(self, totals: np.ndarray,
+                        groups: Optional[Dict[str, str]] = None,
+                        max_nodes: int = 50,
+                        resource_emergy: Optional[pd.DataFrame] = None,
+                        other_label: str = 'Outros') -> pd.DataFrame:
+        """
+        Agrega os fluxos de emergia para desenhar um diagrama de Sankey.
+
+        Sem grupos explícitos, os max_nodes processos de maior emergia são
+        mantidos e os demais agrupados em um único nó. Fluxos internos a um
+        mesmo grupo são descartados.
+
+        Args:
+            totals: Emergia acumulada de cada processo (ver propagate)
+            groups: Dicionário {processo: grupo}; processos omitidos vão
+                para other_label
+            max_nodes: Número de processos mantidos quando groups é omitido
+            resource_emergy: Emergia direta por processo (linhas, na ordem
+                dos processos) e recurso (colunas), incluída como nós de origem
+            other_label: Nome do grupo que reúne os demais processos
+
+        Returns:
+            DataFrame com as colunas 'Origem', 'Destino' e 'Emergia'
+        """
+        labels = self._group_labels(totals, groups, max_nodes, other_label)
+        consumers = np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+        frames = [pd.DataFrame({
+            'Origem': labels[self.indices],
+            'Destino': labels[consumers],
+            'Emergia': self.weights * totals[self.indices]
+        })]
+
+        if resource_emergy is not None:
+            values = resource_emergy.to_numpy(dtype=np.float64)
+            rows, cols = np.nonzero(values)
+            frames.append(pd.DataFrame({
+                'Origem': resource_emergy.columns.values[cols].astype(object),
+                'Destino': labels[rows],
+                'Emergia': values[rows, cols]
+            }))
+
+        flows = pd.concat(frames, ignore_index=True)
+        flows = flows[flows['Origem'] != flows['Destino']]
+        return (flows.groupby(['Origem', 'Destino'], sort=False, as_index=False)['Emergia']
+                .sum()
+                .sort_values('Emergia', ascending=False, ignore_index=True))
+
+    def _group_labels(self, totals: np.ndarray, groups: Optional[Dict[str, str]],
+                      max_nodes: int, other_label: str) -> np.ndarray:
+        """Retorna o rótulo de grupo de cada processo."""
+        if groups is not None:
+            return np.array([groups.get(p, other_label) for p in self.processes],
+                            dtype=object)
+        labels = np.full(self.node_count, other_label, dtype=object)
+        if max_nodes > 0:
+            keep = np.argsort(totals, kind='stable')[::-1][:max_nodes]
+            labels[keep] = self.processes.values[keep]
+        return labels
@@ -0,0 +1,226 @@
+"""
+Módulo para geração de relatórios PDF dos resultados emergéticos.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfgen import canvas
+
+from .emergy_calculator import EmergyResult, emergy_arrays
+
+def top_processes(result: EmergyResult, top_n: int = 20,
+                  other_label: str = 'Outros') -> Tuple[list, np.ndarray]:
+    """
+    Seleciona os processos de maior emergia e agrega os demais.
+
+    Args:
+        result: Resultado do cálculo
+        top_n: Número de processos mantidos (0 agrega todos em other_label)
+        other_label: Rótulo da linha que reúne os demais processos
+
+    Returns:
+        Tupla (nomes, valores) em ordem decrescente, com a linha
+        other_label ao final quando há processos agregados
+    """
+    names, values = emergy_arrays(result.process_emergy)
+    if top_n <= 0:
+        return [other_label], np.array([float(np.sum(values))])
+    if len(values) <= top_n:
+        order = np.argsort(values, kind='stable')[::-1]
+        return list(names[order]), values[order]
+
+    # argpartition seleciona os maiores em O(n); só eles são ordenados
+    top = np.argpartition(values, len(values) - top_n)[-top_n:]
+    top = top[np.argsort(values[top], kind='stable')[::-1]]
+    mask = np.ones(len(values), dtype=bool)
+    mask[top] = False
+    others = float(np.sum(values[mask]))
+    return list(names[top]) + [other_label], np.append(values[top], others)
+
+class ReportGenerator:
+    """Classe responsável pela geração de relatórios PDF em segundo plano."""
+
+    PAGE_WIDTH, PAGE_HEIGHT = A4
+    MARGIN = 2 * cm
+    LINE_HEIGHT = 14
+
+    def __init__(self, top_n: int = 20, cache_size: int = 32):
+        """
+        Inicializa o gerador de relatórios.
+
+        Args:
+            top_n: Número de processos detalhados em gráficos e tabelas
+            cache_size: Número de gráficos mantidos em cache
+
+        Raises:
+            ValueError: se top_n for menor que 1
+        """
+        if top_n < 1:
+            raise ValueError(f"top_n deve ser ao menos 1: {top_n}")
+        self.top_n = top_n
+        self._cache_size = cache_size
+        # {(id do resultado, top_n): (referência fraca, (gráfico, nomes, valores))}
+        self._chart_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix='scale-report')
+
+    def _chart(self, result: EmergyResult) -> Tuple[Drawing, list, np.ndarray]:
+        """Retorna o gráfico de barras do resultado, reutilizando o cache."""
+        # A chave identifica o próprio objeto; a referência fraca confirma que
+        # o id não foi reaproveitado por outro resultado
+        key = (id(result), self.top_n)
+        with self._cache_lock:
+            cached = self._chart_cache.get(key)
+            if cached is not None and cached[0]() is result:
+                self._chart_cache.move_to_end(key)
+                return cached[1]
+
+        names, values = top_processes(result, self.top_n)
+        width = self.PAGE_WIDTH - 2 * self.MARGIN
+        height = max(120, 18 * len(names) + 40)
+        drawing = Drawing(width, height)
+        chart = HorizontalBarChart()
+        chart.x = 6 * cm
+        chart.y = 20
+        chart.width = width - chart.x - 10
+        chart.height = height - 40
+        # O gráfico desenha de baixo para cima; inverte para o maior ficar no topo
+        chart.data = [list(values[::-1])]
+        chart.categoryAxis.categoryNames = [str(n)[:40] for n in names[::-1]]
+        chart.categoryAxis.labels.fontSize = 7
+        chart.valueAxis.labels.fontSize = 7
+        chart.valueAxis.valueMin = 0
+        chart.bars[0].fillColor = colors.HexColor('#2e7d32')
+        drawing.add(chart)
+
+        entry = (drawing, names, values)
+        with self._cache_lock:
+            self._chart_cache[key] = (weakref.ref(result), entry)
+            while len(self._chart_cache) > self._cache_size:
+                self._chart_cache.popitem(last=False)
+        return entry
+
+    def generate(self, result: EmergyResult, file_path: str,
+                 summary: Union[Dict, Callable[[], Optional[Dict]], None] = None, title: str = "Relatório Emergético") -> bool:
+        """
+        Gera o relatório PDF de um resultado.
+
+        O tamanho do documento não depende do número de processos: gráficos
+        e tabelas mostram os top_n processos e agregam os demais em "Outros".
+
+        Args:
+            result: Resultado do cálculo
+            file_path: Caminho do arquivo PDF de saída
+            summary: Resumo da matriz (LCIManager.get_matrix_summary) ou
+                função que o calcula, chamada durante a geração
+            title: Título do relatório
+
+        Returns:
+            bool: True se a geração foi bem-sucedida
+        """
+        try:
+            if callable(summary):
+                summary = summary()
+            drawing, names, values = self._chart(result)
+            pdf = canvas.Canvas(file_path, pagesize=A4)
+            pdf.setTitle(title)
+
+            y = self._header(pdf, title)
+            y = self._write_lines(pdf, y, [
+                f"Total Emergia: {result.total_emergy:.4g}",
+                f"Data Cálculo: {result.calculation_date}",
+                f"Processos: {len(result.process_emergy)}"
+            ])
+
+            y -= self.LINE_HEIGHT
+            y = self._write_lines(pdf, y, [f"Maiores contribuições (top {self.top_n})"], bold=True)
+            if y - drawing.height < self.MARGIN:
+                y = self._new_page(pdf)
+            renderPDF.draw(drawing, pdf, self.MARGIN, y - drawing.height)
+            y -= drawing.height + self.LINE_HEIGHT
+
+            total = result.total_emergy or 1.0
+            rows = [f"{str(name)[:60]:<60} {value:>14.4g} {100 * value / total:>7.2f}%"
+                    for name, value in zip(names, values)]
+            y = self._write_lines(pdf, y, rows, mono=True)
+
+            if summary:
+                y -= self.LINE_HEIGHT
+                y = self._write_lines(pdf, y, [
+                    "Resumo da Matriz LCI",
+                    f"Linhas: {summary['total_rows']}, Colunas: {summary['total_columns']}"
+                ], bold=True)
+                rows = [f"{str(col)[:30]:<30} média {stats['mean']:>11.4g}  "
+                        f"mín {stats['min']:>11.4g}  máx {stats['max']:>11.4g}"
+                        for col, stats in list(summary['column_stats'].items())[:self.top_n]]
+                if len(summary['column_stats']) > self.top_n:
+                    rows.append(f"... {len(summary['column_stats']) - self.top_n} colunas omitidas")
+                self._write_lines(pdf, y, rows, mono=True)
+
+            pdf.showPage()
+            pdf.save()
+            return True
+        except Exception as e:
+            print(f"Erro ao gerar relatório: {str(e)}")
+            return False
+
+    def generate_async(self, result: EmergyResult, file_path: str,
+                       summary: Union[Dict, Callable[[], Optional[Dict]], None] = None,
+                       callback: Optional[Callable[[bool], None]] = None) -> Future:
+        """
+        Gera o relatório em uma thread de fundo, sem bloquear a interface.
+
+        Args:
+            result: Resultado do cálculo
+            file_path: Caminho do arquivo PDF de saída
+            summary: Resumo da matriz ou função que o calcula; a função é
+                chamada na thread de fundo
+            callback: Função chamada (na thread de fundo) com o sucesso da geração
+
+        Returns:
+            Future com o retorno de generate
+        """
+        future = self._executor.submit(self.generate, result, file_path, summary)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(f.result()))
+        return future
+
+    def shutdown(self) -> None:
+        """Aguarda os relatórios pendentes e encerra a thread de fundo."""
+        self._executor.shutdown(wait=True)
+
+    def _header(self, pdf: canvas.Canvas, title: str) -> float:
+        """Escreve o título e retorna a posição vertical seguinte."""
+        pdf.setFont('Helvetica-Bold', 16)
+        y = self.PAGE_HEIGHT - self.MARGIN
+        pdf.drawString(self.MARGIN, y, title)
+        return y - 2 * self.LINE_HEIGHT
+
+    def _new_page(self, pdf: canvas.Canvas) -> float:
+        """Finaliza a página atual e retorna o topo da próxima."""
+        pdf.showPage()
+        return self.PAGE_HEIGHT - self.MARGIN
+
+    def _write_lines(self, pdf: canvas.Canvas, y: float, lines: list,
+                     bold: bool = False, mono: bool = False) -> float:
+        """Escreve linhas de texto, quebrando a página quando necessário."""
+        font = 'Courier' if mono else ('Helvetica-Bold' if bold else 'Helvetica')
+        size = 8 if mono else 10
+        for line in lines:
+            if y < self.MARGIN:
+                y = self._new_page(pdf)
+            pdf.setFont(font, size)
+            pdf.drawString(self.MARGIN, y, line)
+            y -= self.LINE_HEIGHT
+        return y
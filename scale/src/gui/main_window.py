@@ -6,7 +6,7 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QTableWidgetItem, QMessageBox, QTabWidget,
                             QGroupBox, QFormLayout, QLineEdit, QSpinBox,
                             QDoubleSpinBox, QComboBox)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QFileSystemWatcher, QObject, pyqtSignal
 import pandas as pd
 from typing import Optional, Dict
 import os
@@ -14,10 +14,18 @@ from datetime import datetime
 
 from src.core.lci_manager import LCIManager
 from src.core.emergy_calculator import EmergyCalculator, EmergyResult
+from src.core.report_generator import ReportGenerator
+
+class _ReportSignals(QObject):
+    """Sinais para retornar à thread da interface ao fim de um relatório."""
+    finished = pyqtSignal(bool, str)
 
 class MainWindow(QMainWindow):
     """Janela principal da aplicação."""
     
+    # Número máximo de linhas exibidas na tabela de diferenças
+    MAX_DIFF_ROWS = 1000
+    
     def __init__(self):
         """Inicializa a janela principal."""
         super().__init__()
@@ -27,6 +35,15 @@ class MainWindow(QMainWindow):
         # Inicializa os componentes do sistema
         self.lci_manager = LCIManager()
         self.emergy_calculator = EmergyCalculator()
+        self._result_matrix_name: Optional[str] = None
+        self._matrix_results: Dict[str, EmergyResult] = {}
+        self.report_generator = ReportGenerator()
+        self._report_signals = _ReportSignals()
+        self._report_signals.finished.connect(self._on_report_finished)
+        
+        # Observa os arquivos de origem para reimportação incremental
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self._on_source_changed)
         
         # Configura a interface
         self._setup_ui()
@@ -58,6 +75,11 @@ class MainWindow(QMainWindow):
         results_tab = QWidget()
         self._setup_results_tab(results_tab)
         tab_widget.addTab(results_tab, "Resultados")
+        
+        # Aba de Comparação
+        compare_tab = QWidget()
+        self._setup_compare_tab(compare_tab)
+        tab_widget.addTab(compare_tab, "Comparação")
     
     def _setup_import_tab(self, tab: QWidget):
         """Configura a aba de importação."""
@@ -145,8 +167,44 @@ class MainWindow(QMainWindow):
         self.export_results_btn = QPushButton("Exportar Resultados")
         self.export_results_btn.clicked.connect(self._export_results)
         btn_layout.addWidget(self.export_results_btn)
+        
+        self.report_btn = QPushButton("Gerar Relatório PDF")
+        self.report_btn.clicked.connect(self._generate_report)
+        btn_layout.addWidget(self.report_btn)
         layout.addLayout(btn_layout)
     
+    def _setup_compare_tab(self, tab: QWidget):
+        """Configura a aba de comparação."""
+        layout = QVBoxLayout(tab)
+        
+        # Grupo de seleção
+        select_group = QGroupBox("Comparar Versões")
+        select_layout = QFormLayout()
+        self.compare_combo_a = QComboBox()
+        select_layout.addRow("Referência (A):", self.compare_combo_a)
+        self.compare_combo_b = QComboBox()
+        select_layout.addRow("Comparada (B):", self.compare_combo_b)
+        select_group.setLayout(select_layout)
+        layout.addWidget(select_group)
+        
+        # Botões de comparação
+        btn_layout = QHBoxLayout()
+        self.compare_matrix_btn = QPushButton("Comparar Matrizes")
+        self.compare_matrix_btn.clicked.connect(self._compare_matrices)
+        btn_layout.addWidget(self.compare_matrix_btn)
+        
+        self.compare_results_btn = QPushButton("Comparar Resultados")
+        self.compare_results_btn.clicked.connect(self._compare_results)
+        btn_layout.addWidget(self.compare_results_btn)
+        layout.addLayout(btn_layout)
+        
+        # Tabela de diferenças
+        self.diff_table = QTableWidget()
+        layout.addWidget(self.diff_table)
+        
+        self.diff_info = QLabel("Nenhuma comparação realizada")
+        layout.addWidget(self.diff_info)
+    
     def _import_lci(self):
         """Importa um arquivo LCI."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -163,6 +221,8 @@ class MainWindow(QMainWindow):
                 self._display_matrix(self.lci_manager.get_matrix(name))
                 self._update_matrix_info(name)
                 self._update_matrix_combo()
+                if file_path not in self.file_watcher.files():
+                    self.file_watcher.addPath(file_path)
             else:
                 QMessageBox.critical(self, "Erro", "Falha ao importar arquivo")
     
@@ -211,8 +271,10 @@ class MainWindow(QMainWindow):
     
     def _update_matrix_combo(self):
         """Atualiza o combo box de seleção de matriz."""
-        self.matrix_combo.clear()
-        self.matrix_combo.addItems(self.lci_manager.list_available_matrices())
+        matrices = self.lci_manager.list_available_matrices()
+        for combo in (self.matrix_combo, self.compare_combo_a, self.compare_combo_b):
+            combo.clear()
+            combo.addItems(matrices)
     
     def _update_transformity(self):
         """Atualiza os campos de transformidade com base na matriz selecionada."""
@@ -252,10 +314,83 @@ class MainWindow(QMainWindow):
         # Configura e realiza o cálculo
         self.emergy_calculator.set_transformity_factors(transformity_factors)
         result = self.emergy_calculator.calculate_emergy(matrix)
+        self._result_matrix_name = name
+        self._matrix_results[name] = result
         
         # Exibe os resultados
         self._display_results(result)
     
+    def _on_source_changed(self, file_path: str):
+        """Aplica as alterações de um arquivo LCI modificado externamente."""
+        # Alguns editores substituem o arquivo, removendo-o do observador
+        if os.path.exists(file_path) and file_path not in self.file_watcher.files():
+            self.file_watcher.addPath(file_path)
+        
+        updates = self.lci_manager.check_for_updates()
+        for name, changes in updates.items():
+            matrix = self.lci_manager.get_matrix(name)
+            if name == self.matrix_combo.currentText():
+                self._display_matrix(matrix)
+                self._update_matrix_info(name)
+            
+            latest = self.emergy_calculator.get_results('latest').get('latest')
+            if latest is not None and name == self._result_matrix_name:
+                result = self.emergy_calculator.update_emergy(latest, matrix, changes)
+                self._matrix_results[name] = result
+                self._display_results(result)
+    
+    def _compare_matrices(self):
+        """Compara as duas matrizes LCI selecionadas."""
+        name_a = self.compare_combo_a.currentText()
+        name_b = self.compare_combo_b.currentText()
+        if not name_a or not name_b:
+            QMessageBox.warning(self, "Aviso", "Selecione duas matrizes LCI")
+            return
+        
+        diff = self.lci_manager.diff(name_a, name_b)
+        if diff is None:
+            QMessageBox.critical(self, "Erro", "Falha ao comparar matrizes")
+            return
+        self._display_diff(diff, f"{len(diff)} células alteradas entre {name_a} e {name_b}")
+    
+    def _compare_results(self):
+        """Compara os resultados calculados para as duas matrizes selecionadas."""
+        name_a = self.compare_combo_a.currentText()
+        name_b = self.compare_combo_b.currentText()
+        result_a = self._matrix_results.get(name_a)
+        result_b = self._matrix_results.get(name_b)
+        if result_a is None or result_b is None:
+            QMessageBox.warning(self, "Aviso", "Calcule a emergia das duas matrizes primeiro")
+            return
+        
+        diff = self.emergy_calculator.diff_results(result_a, result_b)
+        total_delta = result_b.total_emergy - result_a.total_emergy
+        self._display_diff(diff, f"{len(diff)} processos alterados\n"
+                                 f"Delta Total Emergia: {total_delta:.2f}")
+    
+    def _display_diff(self, diff: pd.DataFrame, info: str):
+        """
+        Exibe apenas as diferenças de uma comparação.
+        
+        A tabela mostra no máximo MAX_DIFF_ROWS linhas, as de maior
+        |Delta Absoluto|; o total de diferenças é informado em info.
+        """
+        if len(diff) > self.MAX_DIFF_ROWS:
+            largest = diff['Delta Absoluto'].abs().nlargest(self.MAX_DIFF_ROWS).index
+            diff = diff.loc[largest]
+            info += f"\nExibindo as {self.MAX_DIFF_ROWS} maiores diferenças (|Delta Absoluto|)"
+        
+        self.diff_table.setRowCount(len(diff))
+        self.diff_table.setColumnCount(len(diff.columns))
+        self.diff_table.setHorizontalHeaderLabels(list(diff.columns))
+        
+        for j, col in enumerate(diff.columns):
+            for i, value in enumerate(diff[col].tolist()):
+                text = f"{value:.4g}" if isinstance(value, float) else str(value)
+                self.diff_table.setItem(i, j, QTableWidgetItem(text))
+        
+        self.diff_info.setText(info)
+    
     def _display_results(self, result: EmergyResult):
         """Exibe os resultados do cálculo."""
         # Atualiza a tabela de resultados
@@ -290,4 +425,36 @@ class MainWindow(QMainWindow):
         if file_path:
             success = self.emergy_calculator.export_results(result['latest'], file_path)
             if not success:
-                QMessageBox.critical(self, "Erro", "Falha ao exportar resultados") 
\ No newline at end of file
+                QMessageBox.critical(self, "Erro", "Falha ao exportar resultados")
+    
+    def _generate_report(self):
+        """Gera o relatório PDF do último resultado em segundo plano."""
+        result = self.emergy_calculator.get_results('latest').get('latest')
+        if not result:
+            QMessageBox.warning(self, "Aviso", "Nenhum resultado para o relatório")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Salvar relatório",
+            "",
+            "Arquivos PDF (*.pdf)"
+        )
+        
+        if file_path:
+            # O resumo percorre a matriz inteira; é calculado na thread de fundo
+            matrix_name = self._result_matrix_name
+            self.report_btn.setEnabled(False)
+            self.report_generator.generate_async(
+                result, file_path,
+                lambda: self.lci_manager.get_matrix_summary(matrix_name),
+                callback=lambda success: self._report_signals.finished.emit(success, file_path)
+            )
+    
+    def _on_report_finished(self, success: bool, file_path: str):
+        """Informa o término da geração do relatório."""
+        self.report_btn.setEnabled(True)
+        if success:
+            QMessageBox.information(self, "Relatório", f"Relatório salvo em {file_path}")
+        else:
+            QMessageBox.critical(self, "Erro", "Falha ao gerar relatório")
\ No newline at end of file
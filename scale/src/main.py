@@ -3,17 +3,43 @@ Arquivo principal do sistema SCALE.
 """
 import sys
 import os
+import argparse
 
 # Adiciona o diretório raiz ao PYTHONPATH
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from PyQt6.QtWidgets import QApplication
-from src.gui.main_window import MainWindow
+def run_server(args):
+    """Inicia o serviço local de cálculo."""
+    from src.core.calculation_service import CalculationService
+    
+    service = CalculationService(workers=args.workers)
+    for spec in args.load:
+        name, _, file_path = spec.partition('=')
+        if not service.load_matrix(name, file_path):
+            print(f"Falha ao carregar {file_path}")
+    service.serve_forever(args.host, args.port)
 
 def main():
     """Função principal que inicia a aplicação."""
+    parser = argparse.ArgumentParser(description="SCALE - Sistema de Cálculo Emergético")
+    parser.add_argument('--server', action='store_true',
+                        help="Inicia o serviço local de cálculo em vez da interface")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--load', action='append', default=[], metavar='NOME=ARQUIVO',
+                        help="Matriz LCI a manter carregada no serviço")
+    args, qt_args = parser.parse_known_args()
+    
+    if args.server:
+        run_server(args)
+        return
+    
+    from PyQt6.QtWidgets import QApplication
+    from src.gui.main_window import MainWindow
+    
     print("Iniciando aplicação...")
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     print("Criando janela principal...")
     window = MainWindow()
     print("Mostrando janela...")
@@ -22,4 +48,4 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
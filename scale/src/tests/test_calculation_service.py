@@ -0,0 +1,112 @@
+"""
+Testes unitários para o serviço local de cálculo.
+"""
+import json
+import pytest
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from ..core.calculation_service import CalculationService
+from ..core.emergy_calculator import EmergyCalculator
+
+@pytest.fixture
+def service(tmp_path):
+    """Cria um serviço com uma matriz carregada."""
+    path = tmp_path / 'lci.csv'
+    pd.DataFrame({
+        'Processo': ['A', 'B'],
+        'Energia Solar': [1000.0, 800.0],
+        'Água': [2.0, 1.5]
+    }).to_csv(path, index=False)
+    
+    service = CalculationService(workers=2, batch_window=0.05)
+    assert service.load_matrix('lci', str(path))
+    yield service
+    service.stop()
+
+def test_concurrent_requests_are_batched(service):
+    """Testa o agrupamento de requisições simultâneas."""
+    factor_sets = [{'Água': float(i)} for i in range(8)]
+    futures = [service.submit('lci', factors) for factors in factor_sets]
+    results = [future.result(timeout=5) for future in futures]
+    
+    calculator = EmergyCalculator()
+    matrix = service.lci_manager.get_matrix('lci')
+    for factors, result in zip(factor_sets, results):
+        calculator.set_transformity_factors(factors)
+        expected = calculator.calculate_emergy(matrix)
+        assert result.process_emergy == pytest.approx(expected.process_emergy)
+    
+    metrics = service.get_metrics()
+    assert metrics['completed_requests'] == 8
+    assert metrics['batches'] == 1
+
+def test_http_calculate(service):
+    """Testa o cálculo via HTTP em localhost."""
+    host, port = service.start('127.0.0.1', 0)
+    url = f"http://{host}:{port}"
+    
+    def post(factor):
+        body = json.dumps({'matrix': 'lci', 'transformity': {'Água': factor}}).encode()
+        request = Request(f"{url}/calculate", data=body,
+                          headers={'Content-Type': 'application/json'})
+        with urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        payloads = list(pool.map(post, [10.0, 10.0, 20.0, 30.0]))
+    
+    assert payloads[0]['process_emergy']['A'] == pytest.approx(1000.0 + 20.0)
+    assert payloads[3]['total_emergy'] == pytest.approx(1800.0 + 3.5 * 30.0)
+    
+    with urlopen(f"{url}/metrics", timeout=5) as response:
+        metrics = json.loads(response.read())
+    assert metrics['completed_requests'] == 4
+    assert metrics['matrices'] == ['lci']
+
+def test_invalid_request_fails_alone(service):
+    """Testa se uma requisição inválida não afeta as demais do lote."""
+    bad = service.submit('lci', {'Água': 'abc'})
+    good = service.submit('lci', {'Água': 2.0})
+    
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert good.result(timeout=5).process_emergy['A'] == pytest.approx(1004.0)
+
+def test_http_invalid_transformity(service):
+    """Testa a resposta 400 para fatores de transformidade inválidos."""
+    host, port = service.start('127.0.0.1', 0)
+    body = json.dumps({'matrix': 'lci', 'transformity': ['Água']}).encode()
+    request = Request(f"http://{host}:{port}/calculate", data=body,
+                      headers={'Content-Type': 'application/json'})
+    with pytest.raises(HTTPError) as error:
+        urlopen(request, timeout=5)
+    assert error.value.code == 400
+
+def test_http_rejects_non_object_and_non_finite(service):
+    """Testa as respostas para corpo que não é objeto e para resultado não finito."""
+    host, port = service.start('127.0.0.1', 0)
+    
+    def post(payload):
+        request = Request(f"http://{host}:{port}/calculate", data=json.dumps(payload).encode(),
+                          headers={'Content-Type': 'application/json'})
+        with pytest.raises(HTTPError) as error:
+            urlopen(request, timeout=5)
+        return error.value.code, json.loads(error.value.read())
+    
+    assert post([1, 2])[0] == 400
+    code, body = post({'matrix': 'lci', 'transformity': {'Energia Solar': 1e306}})
+    assert code == 422
+    assert 'erro' in body
+
+def test_stop_fails_pending_requests():
+    """Testa se o encerramento não deixa requisições pendentes sem resposta."""
+    service = CalculationService(batch_window=10.0)
+    future = service.submit('lci', {})
+    service.stop()
+    
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
+    with pytest.raises(RuntimeError):
+        service.submit('lci', {}).result(timeout=1)
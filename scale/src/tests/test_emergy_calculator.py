@@ -4,7 +4,7 @@ Testes unitários para o calculador de emergia.
 import pytest
 import pandas as pd
 import numpy as np
-from ..core.emergy_calculator import EmergyCalculator
+from ..core.emergy_calculator import EmergyCalculator, ProcessEmergy
 
 def test_emergy_calculation():
     """Testa o cálculo básico de emergia."""
@@ -65,4 +65,145 @@ def test_network_emergy_calculation():
     expected_process = np.array([32.0, 41.0])  # (3*4 + 4*5), (4*4 + 5*5)
     
     np.testing.assert_array_almost_equal(input_emergy, expected_input)
-    np.testing.assert_array_almost_equal(process_emergy, expected_process) 
\ No newline at end of file
+    np.testing.assert_array_almost_equal(process_emergy, expected_process) 
+
+def test_compensated_summation():
+    """Testa a soma compensada com magnitudes muito diferentes."""
+    matrix = pd.DataFrame({
+        'Processo': ['A'],
+        'Matéria Prima': [1e11],
+        'Energia Solar': [1e-5],
+        'Água': [-1e11]
+    })
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({'Matéria Prima': 1.0, 'Energia Solar': 1.0, 'Água': 1.0})
+    result = calculator.calculate_emergy(matrix)
+    assert result.process_emergy['A'] == pytest.approx(1e-5, rel=1e-6)
+
+def test_validate_precision():
+    """Testa o relatório de validação do modo compacto."""
+    matrix = pd.DataFrame({
+        'Processo': ['A', 'B', 'C'],
+        'Energia Solar': [1000.1, 800.2, 1200.3],
+        'Matéria Prima': [3000.4, 2500.5, 3500.6]
+    })
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({})
+    report = calculator.validate_precision(matrix)
+    
+    assert report['total_rel_error'] < 1e-6
+    assert report['max_rel_error'] < 1e-6
+    assert report['compact_memory_bytes'] < report['full_memory_bytes']
+    assert calculator.get_results() == {}
+
+def test_update_emergy_recomputes_affected_processes():
+    """Testa o recálculo incremental após alterações de linhas."""
+    old = pd.DataFrame({
+        'Processo': ['A', 'B', 'C'],
+        'Energia Solar': [1.0, 2.0, 3.0],
+        'Água': [1.0, 1.0, 1.0]
+    })
+    new = pd.DataFrame({
+        'Processo': ['A', 'C', 'D'],
+        'Energia Solar': [1.0, 5.0, 4.0],
+        'Água': [1.0, 1.0, 2.0]
+    })
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({'Água': 10.0})
+    previous = calculator.calculate_emergy(old)
+    
+    changes = {'added': ['D'], 'removed': ['B'], 'modified': ['C'], 'full_reload': False}
+    updated = calculator.update_emergy(previous, new, changes)
+    expected = calculator.calculate_emergy(new)
+    
+    assert updated.process_emergy == expected.process_emergy
+    assert updated.total_emergy == pytest.approx(expected.total_emergy)
+    assert updated.metadata['recomputed_processes'] == 2
+    assert isinstance(updated.process_emergy, ProcessEmergy)
+    assert list(updated.process_emergy) == ['A', 'C', 'D']
+    
+    # Matriz em outra ordem: as linhas afetadas são localizadas pelo índice
+    shuffled = calculator.update_emergy(previous, new.iloc[::-1], changes)
+    assert shuffled.process_emergy == expected.process_emergy
+
+def test_diff_results():
+    """Testa a comparação entre dois resultados."""
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({'X': 2.0})
+    result_a = calculator.calculate_emergy(
+        pd.DataFrame({'Processo': ['A', 'B', 'C'], 'X': [1.0, 2.0, 3.0]}))
+    result_b = calculator.calculate_emergy(
+        pd.DataFrame({'Processo': ['A', 'B', 'D'], 'X': [1.0, 3.0, 1.0]}))
+    
+    diff = calculator.diff_results(result_a, result_b).set_index('Processo')
+    
+    assert sorted(diff.index) == ['B', 'C', 'D']
+    assert diff.loc['B', 'Delta Absoluto'] == 2.0
+    assert diff.loc['B', 'Delta Relativo'] == 0.5
+    assert diff.loc['C', 'Delta Absoluto'] == -6.0
+
+def test_parallel_matches_sequential():
+    """Testa se a avaliação paralela em blocos reproduz a sequencial."""
+    rng = np.random.default_rng(0)
+    matrix = pd.DataFrame({
+        'Processo': np.arange(10000),
+        'Energia Solar': rng.random(10000) * 1e3,
+        'Matéria Prima': rng.integers(0, 100, 10000).astype(np.int16)
+    })
+    sequential = EmergyCalculator()
+    parallel = EmergyCalculator(workers=4)
+    parallel.BLOCK_SIZE = 1000
+    for calculator in (sequential, parallel):
+        calculator.set_transformity_factors({})
+    
+    expected = sequential.calculate_emergy(matrix)
+    result = parallel.calculate_emergy(matrix)
+    parallel.set_workers(1)
+    
+    assert result.process_emergy == expected.process_emergy
+    assert result.total_emergy == expected.total_emergy
+
+def test_batch_blocks_bounded_by_scenarios():
+    """Testa o cálculo em lote com blocos limitados por fluxos x cenários."""
+    rng = np.random.default_rng(1)
+    matrix = pd.DataFrame({
+        'Processo': np.arange(500),
+        'Energia Solar': rng.random(500),
+        'Água': rng.integers(0, 50, 500).astype(np.int8)
+    })
+    factor_sets = [{'Água': float(i)} for i in range(40)]
+    calculator = EmergyCalculator()
+    calculator.BLOCK_ELEMENTS = 2 * 40 * 16
+    
+    results = calculator.calculate_emergy_batch(matrix, factor_sets)
+    for factors, result in zip(factor_sets, results):
+        calculator.set_transformity_factors(factors)
+        expected = calculator.calculate_emergy(matrix)
+        assert result.process_emergy == expected.process_emergy
+
+def test_process_emergy_mapping():
+    """Testa o mapeamento de emergia por processo baseado em arrays."""
+    names = np.array(['A', 'B', 'A', 'C'], dtype=object)
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+    process_emergy = ProcessEmergy(names, values)
+    expected = dict(zip(names, values.tolist()))
+    
+    assert process_emergy == expected
+    assert list(process_emergy) == list(expected)
+    assert process_emergy['A'] == 3.0
+    assert 'C' in process_emergy and 'D' not in process_emergy
+    assert len(process_emergy) == 3
+    assert process_emergy.to_dict() == expected
+    with pytest.raises(KeyError):
+        process_emergy['D']
+
+def test_overflow_keeps_infinite_total():
+    """Testa que um produto com overflow resulta em inf, e não em NaN."""
+    matrix = pd.DataFrame({'Processo': ['A', 'B'], 'X': [1e10, 1.0], 'Y': [1.0, 1.0]})
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({'X': 1e300, 'Y': 1.0})
+    result = calculator.calculate_emergy(matrix)
+    
+    assert result.process_emergy['A'] == np.inf
+    assert result.process_emergy['B'] == 1e300 + 1.0
+    assert result.total_emergy == np.inf
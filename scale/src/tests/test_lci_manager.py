@@ -0,0 +1,183 @@
+"""
+Testes unitários para o gerenciador de LCI.
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from ..core.lci_manager import LCIManager, downcast_numeric
+
+def _write_lci(path, rows):
+    """Grava uma matriz LCI de teste em CSV."""
+    df = pd.DataFrame(rows, columns=['Processo', 'Energia Solar', 'Água'])
+    df.to_csv(path, index=False)
+    return df
+
+def test_compact_import(tmp_path):
+    """Testa a importação em modo compacto."""
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.5], ['B', 800, 1.5], ['C', 1200, 2.5]])
+    
+    manager = LCIManager(compact=True)
+    assert manager.import_lci_file(str(path), 'lci')
+    
+    matrix = manager.get_matrix('lci')
+    assert matrix['Energia Solar'].dtype == np.int16
+    assert matrix['Água'].dtype == np.float32
+    
+    metadata = manager.get_matrix_metadata('lci')
+    assert metadata['compact']
+    assert metadata['memory_bytes'] < metadata['full_memory_bytes']
+
+def test_downcast_preserves_values():
+    """Testa se a conversão compacta preserva os valores."""
+    df = pd.DataFrame({'Processo': ['A', 'B'], 'X': [1, 70000], 'Y': [0.25, 3.5]})
+    compact = downcast_numeric(df)
+    assert compact['X'].dtype == np.int32
+    np.testing.assert_array_equal(compact['X'].values, df['X'].values)
+    np.testing.assert_array_equal(compact['Y'].values, df['Y'].values)
+    assert df['Y'].dtype == np.float64
+
+def test_refresh_applies_changed_rows(tmp_path):
+    """Testa a reimportação incremental de um arquivo alterado."""
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.5], ['B', 800, 1.5], ['C', 1200, 2.5]])
+    
+    manager = LCIManager()
+    assert manager.import_lci_file(str(path), 'lci')
+    assert manager.check_for_updates() == {}
+    
+    _write_lci(path, [['A', 1000, 0.5], ['C', 1300, 2.5], ['D', 100, 0.1]])
+    changes = manager.refresh_matrix('lci')
+    
+    assert changes['added'] == ['D']
+    assert changes['removed'] == ['B']
+    assert changes['modified'] == ['C']
+    assert not changes['full_reload']
+    
+    matrix = manager.get_matrix('lci')
+    assert list(matrix['Processo']) == ['A', 'C', 'D']
+    assert list(matrix['Energia Solar']) == [1000, 1300, 100]
+
+def test_refresh_compact_widens_dtype(tmp_path):
+    """Testa a reimportação incremental em modo compacto."""
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 10, 0.5], ['B', 20, 1.5]])
+    
+    manager = LCIManager(compact=True)
+    assert manager.import_lci_file(str(path), 'lci')
+    assert manager.get_matrix('lci')['Energia Solar'].dtype == np.int8
+    
+    _write_lci(path, [['A', 10, 0.5], ['B', 70000, 1.5]])
+    changes = manager.refresh_matrix('lci')
+    
+    assert changes['modified'] == ['B']
+    assert list(manager.get_matrix('lci')['Energia Solar']) == [10, 70000]
+
+def test_diff_returns_only_changed_cells():
+    """Testa a comparação esparsa entre duas matrizes."""
+    manager = LCIManager()
+    a = pd.DataFrame({'Processo': ['A', 'B'], 'X': [1.0, 2.0], 'Y': [3.0, 4.0]})
+    b = pd.DataFrame({'Processo': ['B', 'C'], 'X': [2.0, 5.0], 'Y': [8.0, 1.0]})
+    
+    diff = manager.diff(a, b).set_index(['Processo', 'Fluxo'])
+    
+    assert len(diff) == 5
+    assert ('B', 'X') not in diff.index
+    assert diff.loc[('B', 'Y'), 'Delta Absoluto'] == 4.0
+    assert diff.loc[('B', 'Y'), 'Delta Relativo'] == 1.0
+    assert np.isnan(diff.loc[('A', 'X'), 'Valor B'])
+    assert diff.loc[('A', 'X'), 'Delta Absoluto'] == -1.0
+    assert np.isnan(diff.loc[('C', 'X'), 'Valor A'])
+    assert np.isnan(diff.loc[('C', 'X'), 'Delta Relativo'])
+
+def test_create_variant(tmp_path):
+    """Testa a criação e edição de variantes de uma matriz."""
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.5], ['B', 800, 1.5]])
+    
+    manager = LCIManager()
+    assert manager.import_lci_file(str(path), 'lci')
+    assert manager.create_variant('lci', 'cenario')
+    assert not manager.create_variant('lci', 'cenario')
+    
+    manager.get_variant('cenario').remove_row('A')
+    assert list(manager.get_matrix('cenario')['Processo']) == ['B']
+    assert list(manager.get_matrix('lci')['Processo']) == ['A', 'B']
+    assert manager.get_matrix_metadata('cenario')['rows'] == 1
+    assert manager.list_available_matrices() == ['lci', 'cenario']
+    assert len(manager.diff('lci', 'cenario')) == 2
+
+def test_validate_compact_uses_source_file(tmp_path):
+    """Testa a validação do modo compacto a partir do arquivo de origem."""
+    from ..core.emergy_calculator import EmergyCalculator
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.1], ['B', 800, 1.3], ['C', 1200, 2.7]])
+    
+    manager = LCIManager(compact=True)
+    assert manager.import_lci_file(str(path), 'lci')
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({})
+    
+    report = manager.validate_compact('lci', calculator)
+    assert report['max_abs_error'] > 0
+    assert report['compact_memory_bytes'] < report['full_memory_bytes']
+    with pytest.raises(ValueError):
+        calculator.validate_precision(manager.get_matrix('lci'))
+    
+    _write_lci(path, [['A', 1, 0.1]])
+    assert manager.validate_compact('lci', calculator) is None
+
+def test_validate_compact_after_refresh(tmp_path):
+    """Testa a validação quando a matriz atualizada tem outra ordem de linhas."""
+    from ..core.emergy_calculator import EmergyCalculator
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.5], ['B', 800, 1.5], ['C', 1200, 2.5]])
+    
+    manager = LCIManager(compact=True)
+    assert manager.import_lci_file(str(path), 'lci')
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({})
+    
+    # A nova linha fica no topo do arquivo, mas ao final da matriz armazenada
+    _write_lci(path, [['D', 4000, 0.25], ['A', 1000, 0.5], ['B', 800, 1.5], ['C', 1200, 2.5]])
+    assert 'lci' in manager.check_for_updates()
+    assert list(manager.get_matrix('lci')['Processo']) == ['A', 'B', 'C', 'D']
+    
+    report = manager.validate_compact('lci', calculator)
+    assert report['max_abs_error'] == 0.0
+    assert report['max_rel_error'] == 0.0
+
+def test_variants_share_base_memory(tmp_path):
+    """Testa se variantes materializadas compartilham os blocos da origem."""
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.5], ['B', 800, 1.5]])
+    
+    manager = LCIManager()
+    assert manager.import_lci_file(str(path), 'lci')
+    base = manager.get_matrix('lci')
+    for i in range(3):
+        assert manager.create_variant('lci', f'cenario{i}')
+        variant = manager.get_matrix(f'cenario{i}')
+        assert np.shares_memory(variant['Água'].to_numpy(), base['Água'].to_numpy())
+    
+    assert list(manager._materialized) == ['cenario0', 'cenario1', 'cenario2']
+
+def test_concurrent_variant_materialization(tmp_path):
+    """Testa a materialização de variantes a partir de várias threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    path = tmp_path / 'lci.csv'
+    _write_lci(path, [['A', 1000, 0.5], ['B', 800, 1.5]])
+    
+    manager = LCIManager()
+    assert manager.import_lci_file(str(path), 'lci')
+    names = [f'cenario{i}' for i in range(manager.MATERIALIZED_CACHE_SIZE + 2)]
+    for i, name in enumerate(names):
+        assert manager.create_variant('lci', name)
+        manager.get_variant(name).set_cell('A', 'Água', float(i))
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        matrices = list(pool.map(manager.get_matrix, names * 20))
+    
+    for i, matrix in enumerate(matrices):
+        assert matrix.loc[matrix['Processo'] == 'A', 'Água'].item() == float(i % len(names))
+    assert len(manager._materialized) == manager.MATERIALIZED_CACHE_SIZE
@@ -0,0 +1,80 @@
+"""
+Testes unitários para as matrizes versionadas.
+"""
+import tracemalloc
+import pytest
+import pandas as pd
+import numpy as np
+from ..core.matrix_versions import VersionedMatrix
+
+def _matrix():
+    """Cria uma matriz LCI de teste."""
+    return pd.DataFrame({
+        'Processo': ['A', 'B', 'C'],
+        'X': np.array([1, 2, 3], dtype=np.int8),
+        'Y': [0.5, 1.5, 2.5]
+    })
+
+def test_edits_share_unchanged_columns():
+    """Testa se as edições compartilham os blocos de coluna inalterados."""
+    base = _matrix()
+    versioned = VersionedMatrix(base)
+    versioned.set_cell('B', 'X', 1000)
+    versioned.set_column('Y', [9.0, 8.0, 7.0])
+    
+    matrix = versioned.materialize()
+    assert list(matrix['X']) == [1, 1000, 3]
+    assert list(matrix['Y']) == [9.0, 8.0, 7.0]
+    assert list(base['X']) == [1, 2, 3]
+    
+    versioned.undo()
+    versioned.undo()
+    matrix = versioned.materialize()
+    assert np.shares_memory(matrix['Y'].to_numpy(), base['Y'].to_numpy())
+    assert np.shares_memory(matrix['X'].to_numpy(), base['X'].to_numpy())
+
+def test_history_memory_is_linear():
+    """Testa se a memória do histórico cresce linearmente com as edições."""
+    base = pd.DataFrame({'Processo': np.arange(200000), 'X': np.zeros(200000)})
+    
+    def history_bytes(edits):
+        versioned = VersionedMatrix(base)
+        tracemalloc.start()
+        for i in range(edits):
+            versioned.set_cell(i, 'X', float(i))
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return used
+    
+    small, large = history_bytes(2000), history_bytes(8000)
+    assert large < 6 * small
+
+def test_undo_redo():
+    """Testa o histórico de desfazer e refazer."""
+    versioned = VersionedMatrix(_matrix())
+    versioned.set_row('D', {'X': 4})
+    versioned.remove_row('A')
+    
+    assert list(versioned.materialize()['Processo']) == ['B', 'C', 'D']
+    assert versioned.undo()
+    assert list(versioned.materialize()['Processo']) == ['A', 'B', 'C', 'D']
+    assert versioned.undo()
+    assert not versioned.undo()
+    assert versioned.redo()
+    assert versioned.materialize()['Y'].iloc[-1] == 0.0
+    
+    versioned.remove_column('Y')
+    assert not versioned.can_redo()
+    assert list(versioned.materialize().columns) == ['Processo', 'X']
+    assert list(versioned.materialize(0).columns) == ['Processo', 'X', 'Y']
+
+def test_branch_is_independent():
+    """Testa se variantes derivadas não afetam a origem."""
+    versioned = VersionedMatrix(_matrix())
+    variant = versioned.branch()
+    variant.set_cell('A', 'Y', 10.0)
+    
+    assert versioned.materialize()['Y'].iloc[0] == 0.5
+    assert variant.materialize()['Y'].iloc[0] == 10.0
+    with pytest.raises(KeyError):
+        variant.set_cell('Z', 'Y', 1.0)
@@ -0,0 +1,91 @@
+"""
+Testes unitários para a rede de processos.
+"""
+import pytest
+import pandas as pd
+import numpy as np
+from ..core.process_network import ProcessNetwork
+from ..core.emergy_calculator import EmergyCalculator
+
+def _matrix():
+    """Cria uma rede A -> B -> D e A -> C -> D com recursos primários."""
+    return pd.DataFrame({
+        'Processo': ['D', 'C', 'B', 'A'],
+        'Energia Solar': [1.0, 0.0, 2.0, 10.0],
+        'A': [0.0, 0.5, 2.0, 0.0],
+        'B': [1.0, 0.0, 0.0, 0.0],
+        'C': [3.0, 0.0, 0.0, 0.0]
+    })
+
+def test_topological_order():
+    """Testa a ordenação topológica da rede."""
+    network = ProcessNetwork.from_lci(_matrix())
+    order = network.topological_order()
+    
+    assert network.edge_count == 4
+    assert order[0] == 'A'
+    assert order[-1] == 'D'
+    assert not network.has_cycles()
+
+def test_cycle_detection():
+    """Testa a detecção de ciclos."""
+    matrix = _matrix()
+    matrix.loc[matrix['Processo'] == 'A', 'B'] = 1.0
+    network = ProcessNetwork.from_lci(matrix)
+    
+    assert network.has_cycles()
+    assert sorted(network.find_cycles()) == ['A', 'B', 'C', 'D']
+    with pytest.raises(ValueError):
+        network.topological_order()
+    with pytest.raises(ValueError):
+        network.propagate(np.ones(4))
+
+def test_propagated_emergy():
+    """Testa a propagação da emergia ao longo da rede."""
+    calculator = EmergyCalculator()
+    calculator.set_transformity_factors({'Energia Solar': 1.0})
+    result = calculator.calculate_propagated_emergy(_matrix())
+    
+    assert result.process_emergy['A'] == 10.0
+    assert result.process_emergy['B'] == 2.0 + 2.0 * 10.0
+    assert result.process_emergy['C'] == 0.5 * 10.0
+    assert result.process_emergy['D'] == 1.0 + 22.0 + 3.0 * 5.0
+    assert result.total_emergy == 13.0
+
+def test_aggregate_flows():
+    """Testa a agregação dos fluxos para o diagrama de Sankey."""
+    network = ProcessNetwork.from_lci(_matrix())
+    totals = network.propagate(np.array([1.0, 0.0, 2.0, 10.0]))
+    resources = pd.DataFrame({'Energia Solar': [1.0, 0.0, 2.0, 10.0]})
+    
+    flows = network.aggregate_flows(totals, max_nodes=1, resource_emergy=resources)
+    flows = flows.set_index(['Origem', 'Destino'])['Emergia']
+    
+    assert flows[('Outros', 'D')] == 22.0 + 15.0
+    assert flows[('Energia Solar', 'Outros')] == 12.0
+    assert flows[('Energia Solar', 'D')] == 1.0
+    assert ('Outros', 'Outros') not in flows.index
+
+def test_deep_network_mixes_wide_and_narrow_levels():
+    """Testa a propagação em uma rede larga seguida de uma cadeia longa."""
+    rng = np.random.default_rng(0)
+    n = 3000
+    # 200 nós independentes alimentam uma cadeia de 2800 nós
+    src = np.concatenate([rng.integers(0, 100, 200), np.arange(199, n - 1)])
+    dst = np.concatenate([np.arange(100, 300), np.arange(200, n)])
+    keep = src < dst
+    src, dst = src[keep], dst[keep]
+    weights = rng.random(len(src)) * 0.5
+    order = np.argsort(dst, kind='stable')
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(dst, minlength=n))))
+    network = ProcessNetwork(pd.Index([f'P{i}' for i in range(n)]), indptr,
+                             src[order], weights[order])
+    
+    expected = np.ones(n)
+    for i in range(n):
+        for k in range(indptr[i], indptr[i + 1]):
+            expected[i] += network.weights[k] * expected[network.indices[k]]
+    
+    assert len(network._topological_levels()[0]) >= network.NARROW_LEVEL
+    assert len(network.topological_order()) == n
+    np.testing.assert_allclose(network.propagate(np.ones(n)), expected, rtol=1e-12)
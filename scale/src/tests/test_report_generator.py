@@ -0,0 +1,78 @@
+"""
+Testes unitários para o gerador de relatórios.
+"""
+import threading
+import pytest
+import pandas as pd
+from datetime import datetime
+from ..core.emergy_calculator import EmergyCalculator, EmergyResult
+from ..core.report_generator import ReportGenerator, top_processes
+
+def _result(count):
+    """Cria um resultado com count processos."""
+    process_emergy = {f'P{i}': float(i) for i in range(count)}
+    return EmergyResult(
+        total_emergy=sum(process_emergy.values()),
+        process_emergy=process_emergy,
+        transformity={},
+        calculation_date=datetime.now(),
+        metadata={'process_count': count}
+    )
+
+def test_top_processes_aggregates_others():
+    """Testa a seleção dos maiores processos com a linha 'Outros'."""
+    names, values = top_processes(_result(100), top_n=3)
+    
+    assert names == ['P99', 'P98', 'P97', 'Outros']
+    assert values[-1] == sum(range(97))
+
+def test_generate_report_async(tmp_path):
+    """Testa a geração do relatório em segundo plano e o cache de gráficos."""
+    generator = ReportGenerator(top_n=5)
+    result = _result(10000)
+    path = tmp_path / 'relatorio.pdf'
+    
+    future = generator.generate_async(result, str(path))
+    assert future.result(timeout=30)
+    assert path.read_bytes().startswith(b'%PDF')
+    
+    drawing = generator._chart(result)[0]
+    assert generator.generate(result, str(tmp_path / 'copia.pdf'))
+    assert generator._chart(result)[0] is drawing
+    generator.shutdown()
+
+def test_top_n_validation():
+    """Testa a validação de top_n e a agregação total com top_n = 0."""
+    with pytest.raises(ValueError):
+        ReportGenerator(top_n=0)
+    
+    names, values = top_processes(_result(10), top_n=0)
+    assert names == ['Outros']
+    assert values[0] == sum(range(10))
+
+def test_summary_computed_in_background(tmp_path):
+    """Testa que o resumo passado como função é calculado na thread de fundo."""
+    generator = ReportGenerator(top_n=5)
+    threads = []
+    
+    def summary():
+        threads.append(threading.current_thread())
+        return {'total_rows': 1, 'total_columns': 1,
+                'column_stats': {'Energia': {'mean': 1.0, 'min': 1.0, 'max': 1.0}}}
+    
+    future = generator.generate_async(_result(10), str(tmp_path / 'r.pdf'), summary)
+    assert future.result(timeout=30)
+    assert threads and threads[0] is not threading.main_thread()
+    generator.shutdown()
+
+def test_chart_cache_distinguishes_batch_results():
+    """Testa que resultados de um mesmo lote com o mesmo total não compartilham gráfico."""
+    matrix = pd.DataFrame({'Processo': ['A', 'B'], 'X': [1.0, 0.0], 'Y': [0.0, 1.0]})
+    r1, r2 = EmergyCalculator().calculate_emergy_batch(matrix, [{'X': 2.0, 'Y': 1.0},
+                                                                {'X': 1.0, 'Y': 2.0}])
+    generator = ReportGenerator(top_n=5)
+    
+    assert r1.total_emergy == r2.total_emergy
+    assert generator._chart(r1)[1] == ['A', 'B']
+    assert generator._chart(r2)[1] == ['B', 'A']
+    generator.shutdown()